@@ -0,0 +1,43 @@
+import json
+import sqlite3
+import threading
+import time
+
+from instance_cache import by_abspath, cached_instance
+
+# ========== ASSET MANIFEST ==========
+class AssetManifest:
+    """원본 이미지별로 올려 둔 파일들의 링크(카드의 *_url)를 기억해 두는 SQLite 파일.
+
+    키는 앱이 정한다(원본 content_hash와 만드는 파생본 목록). 같은 이미지를 다시 올리면 업로드와
+    썸네일 생성을 건너뛰고 이 링크를 재사용한다. 요약은 프롬프트가 바뀔 수 있으므로 여기 두지 않는다.
+    여러 프로세스가 같은 파일에 써도 서로의 항목이 지워지지 않도록 항목마다 한 행으로 둔다.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS assets (key TEXT PRIMARY KEY, links TEXT NOT NULL, updated REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> dict | None:
+        with self._lock:
+            row = self._conn.execute("SELECT links FROM assets WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def put(self, key: str, links: dict):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO assets (key, links, updated) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET links = excluded.links, updated = excluded.updated",
+                (key, json.dumps(links, ensure_ascii=False), time.time()),
+            )
+            self._conn.commit()
+
+@cached_instance(by_abspath)
+def get_asset_manifest(path: str) -> AssetManifest:
+    return AssetManifest(path)
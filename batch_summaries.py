@@ -0,0 +1,73 @@
+"""/ae_assets에 이미 올라가 있는 이미지들의 GPT 요약을 OpenAI Batch API로 한꺼번에 채운다.
+
+요약은 앱과 같은 프롬프트(build_summary_request)로 만들고, 결과는 앱의 요약 캐시에
+(이미지 content_hash, 모델, 프롬프트 해시) 키로 넣는다. 앱이 기본 설정(공유 링크, detail 없음)이면
+이후 같은 이미지를 앱에서 올릴 때 바로 재사용된다.
+
+    python batch_summaries.py [--app app3] [--folder /ae_assets] [--model gpt-4o] [--poll 30] [--limit N] [--dry-run]
+"""
+import argparse
+import importlib
+import posixpath
+import re
+
+import uploader
+from clients import get_openai_client
+from dropbox_utils import get_folder_index
+from summarizer import run_batch
+
+# 앱이 만든 썸네일 파생본 (이름이 겹쳐 _1, _2나 Dropbox autorename의 " (1)"이 붙은 것 포함)
+RENDITION_STEM_RE = re.compile(r"_thumb(_alpha)?(_\d+| \(\d+\))?$")
+
+def find_targets(files: dict[str, str], folder: str) -> dict[str, str]:
+    # {원본 content_hash: GPT에게 보여줄 경로}. 앱처럼 JPG 썸네일이 있으면 그것을, 없으면 원본을 쓴다
+    targets = {}
+    for path, content_hash in sorted(files.items()):
+        stem, ext = posixpath.splitext(posixpath.basename(path))
+        if ext.lstrip(".") not in uploader.IMAGE_EXTENSIONS or RENDITION_STEM_RE.search(stem) or content_hash in targets:
+            continue
+        thumb = f"{folder}/{stem}_thumb.jpg".lower()
+        targets[content_hash] = thumb if thumb in files else path
+    return targets
+
+def main():
+    parser = argparse.ArgumentParser(description="기존 이미지 요약을 Batch API로 일괄 생성")
+    parser.add_argument("--app", default="app3", choices=["app2", "app3"], help="프롬프트와 설정을 가져올 앱")
+    parser.add_argument("--folder", default="/ae_assets")
+    parser.add_argument("--model", default="gpt-4o")
+    parser.add_argument("--poll", type=float, default=30.0, help="배치 상태 확인 간격(초)")
+    parser.add_argument("--limit", type=int, default=0, help="이번에 보낼 최대 이미지 수 (0이면 전부)")
+    parser.add_argument("--dry-run", action="store_true", help="대상 목록만 세고 배치는 보내지 않는다")
+    args = parser.parse_args()
+
+    profile = importlib.import_module(args.app).PROFILE
+    dbx = uploader.get_dropbox_client(profile)
+    folder = args.folder.rstrip("/")
+    cache = uploader.open_summary_cache()
+    # 배치는 공유 링크를 detail 없이 보내므로 그 설정의 캐시 키로 저장한다
+    prompt = uploader.summary_prompt_hash(profile)
+
+    targets = find_targets(get_folder_index(dbx, folder).files(), folder)
+    missing = {h: p for h, p in targets.items() if cache.get(h, args.model, prompt) is None}
+    if args.limit:
+        missing = dict(list(missing.items())[:args.limit])
+    print(f"이미지 {len(targets)}개 중 요약이 없는 {len(missing)}개를 배치로 보냅니다.", flush=True)
+    if args.dry_run or not missing:
+        return
+
+    bodies = {h: uploader.build_summary_request(profile, uploader.get_or_create_shared_link(dbx, p), args.model)
+              for h, p in missing.items()}
+    client = get_openai_client(uploader.OPENAI_API_KEY, uploader.OPENAI_BASE_URL)
+    results = run_batch(client, bodies, args.poll, report=lambda msg: print(msg, flush=True))
+
+    failed = 0
+    for content_hash, result in results.items():
+        if isinstance(result, Exception):
+            failed += 1
+            print(f"요약 실패: {missing[content_hash]} - {result}", flush=True)
+            continue
+        cache.put(content_hash, args.model, prompt, result)
+    print(f"완료: 저장 {len(results) - failed}개, 실패 {failed}개", flush=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,364 @@
+"""업로더 파이프라인 성능 측정 도구.
+
+    python bench.py alpha [--edges 0,1000,512,320] [--upscale 7680] [이미지 ...]
+    python bench.py encoders [--formats JPEG,WEBP] [--cutout] [이미지 ...]
+    python bench.py pipeline [--app app2] [--count 40] [--asset-mb 0,2,32] [--json result.json] [--baseline base.json]
+    python bench.py importtime [--module app3] [--top 15]
+"""
+import argparse
+import glob
+import importlib
+import io
+import json
+import math
+import os
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from functools import partial
+
+from PIL import Image, ImageChops, ImageStat
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_IMAGES = sorted(glob.glob(os.path.join(ROOT, "assets", "*.jpg")))
+
+def timed(fn, repeat: int):
+    # 반복 실행의 중앙값(ms)과 마지막 결과를 돌려준다
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), result
+
+def load_image(path: str, upscale: int = 0) -> Image.Image:
+    image = Image.open(path)
+    image.load()
+    if upscale and max(image.size) < upscale:
+        # 8K 텍스처 미리보기 같은 큰 입력을 흉내 낸다
+        ratio = upscale / max(image.size)
+        image = image.resize((round(image.width * ratio), round(image.height * ratio)), Image.Resampling.BICUBIC)
+    return image
+
+# ========== ALPHA ==========
+def bench_alpha(args):
+    from image_utils import alpha_thumbnail, warm_rembg_session
+
+    warm_rembg_session(args.model, args.threads)
+    size = (args.size, args.size)
+    print(f"{'image':<24}{'matte_edge':>11}{'ms':>10}{'speedup':>9}{'alpha MAE':>11}{'>16 diff %':>12}")
+    for path in args.images:
+        image = load_image(path, args.upscale)
+        name = f"{os.path.basename(path)} {image.width}x{image.height}"
+        # matte_edge=0(원본 해상도에서 배경 제거)을 기준 결과로 삼는다
+        ref_ms, reference = timed(lambda: alpha_thumbnail(image, size, 0, args.model, args.threads), args.repeat)
+        ref_alpha = reference.getchannel("A")
+        for edge in args.edges:
+            if edge:
+                ms, result = timed(lambda: alpha_thumbnail(image, size, edge, args.model, args.threads), args.repeat)
+            else:
+                ms, result = ref_ms, reference
+            diff = ImageChops.difference(result.getchannel("A"), ref_alpha)
+            mae = ImageStat.Stat(diff).mean[0]
+            over = diff.point(lambda v: 255 if v > 16 else 0).histogram()[255] / (diff.width * diff.height) * 100
+            print(f"{name:<24}{edge or 'full':>11}{ms:>10.1f}{ref_ms / ms:>8.2f}x{mae:>11.2f}{over:>12.2f}")
+
+# ========== ENCODERS ==========
+def psnr(a: Image.Image, b: Image.Image) -> float:
+    # 모든 채널을 합친 PSNR(dB). 완전히 같으면 inf
+    rms = ImageStat.Stat(ImageChops.difference(a, b)).rms
+    mse = sum(v * v for v in rms) / len(rms)
+    return math.inf if mse == 0 else 10 * math.log10(255 ** 2 / mse)
+
+def bench_encoders(args):
+    from image_utils import ENCODER_PROFILES, alpha_thumbnail
+
+    print(f"{'image':<16}{'format':>7}{'profile':>10}{'ms':>9}{'KB':>9}{'PSNR dB':>9}")
+    totals = {}
+    for path in args.images:
+        thumb = load_image(path)
+        thumb.thumbnail((args.size, args.size))
+        if args.cutout:
+            thumb = alpha_thumbnail(thumb, thumb.size, max(thumb.size), args.model, args.threads)
+        elif thumb.mode not in ("RGB", "L"):
+            thumb = thumb.convert("RGB")
+        for fmt in args.formats:
+            if fmt == "JPEG" and thumb.mode == "RGBA":
+                continue
+            for profile, params in ENCODER_PROFILES[fmt].items():
+                def encode():
+                    buf = io.BytesIO()
+                    thumb.save(buf, format=fmt, **params)
+                    return buf.getvalue()
+                ms, data = timed(encode, args.repeat)
+                decoded = Image.open(io.BytesIO(data)).convert(thumb.mode)
+                quality = psnr(decoded, thumb)
+                print(f"{os.path.basename(path):<16}{fmt:>7}{profile:>10}{ms:>9.1f}{len(data) / 1024:>9.1f}{quality:>9.2f}")
+                total = totals.setdefault((fmt, profile), [0.0, 0, []])
+                total[0] += ms
+                total[1] += len(data)
+                total[2].append(quality)
+    print(f"\n{'합계':<16}{'format':>7}{'profile':>10}{'ms':>9}{'KB':>9}{'PSNR dB':>9}")
+    for (fmt, profile), (ms, size, qualities) in totals.items():
+        print(f"{'':<16}{fmt:>7}{profile:>10}{ms:>9.1f}{size / 1024:>9.1f}{statistics.mean(qualities):>9.2f}")
+
+# ========== PIPELINE ==========
+def percentile(values: list[float], q: float) -> float:
+    # 최근접 순위 방식. 값이 없으면 0
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+def peak_rss_mb() -> float:
+    # 이 프로세스의 최대 RSS. Linux는 /proc의 VmHWM을, 없으면 getrusage를 쓴다 (Linux는 KB, macOS는 바이트)
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if peak > 2**24 else peak / 1024
+
+def make_inputs(workdir: str, images: list[str], count: int, asset_sizes: list[float]) -> list[tuple[str, str | None]]:
+    """이미지 count장과 짝지을 합성 자산을 만든다.
+
+    매니페스트와 content_hash 중복 검사에 걸리지 않도록 복사본마다 모서리에 색이 다른 조각을 찍어
+    썸네일까지 내용이 다르게 하고, 자산은 asset_sizes(MB, 0이면 자산 없음)를 차례로 돌려 가며 만든다.
+    """
+    os.makedirs(workdir, exist_ok=True)
+    block = os.urandom(2**20)
+    sources = {path: load_image(path) for path in images}
+    inputs = []
+    for n in range(count):
+        source = images[n % len(images)]
+        stem, ext = os.path.splitext(os.path.basename(source))
+        image_path = os.path.join(workdir, f"{stem}_{n:04d}{ext}")
+        image = sources[source].copy()
+        edge = max(16, image.width // 40)
+        image.paste((n * 37 % 256, n * 101 % 256, n * 211 % 256, 255)[:len(image.getbands())], (0, 0, edge, edge))
+        image.save(image_path, format=sources[source].format, quality=95)
+        asset_path = None
+        size = int(asset_sizes[n % len(asset_sizes)] * 2**20) if asset_sizes else 0
+        if size:
+            asset_path = os.path.join(workdir, f"{stem}_{n:04d}.zip")
+            with open(asset_path, "wb") as f:
+                f.write(f"bench asset {n}\n".encode())
+                written = 0
+                while written < size:
+                    written += f.write(block[:size - written])
+        inputs.append((image_path, asset_path))
+    return inputs
+
+def bench_pipeline(args):
+    """main()과 같은 작업 큐와 run_job을 스텁 Dropbox/OpenAI로 돌려 처리량과 지연을 잰다."""
+    from openai_stub import OpenAIStub
+
+    workdir = tempfile.mkdtemp(prefix="bench_pipeline_")
+    stub = OpenAIStub(latency=args.openai_latency, rate_limit=args.openai_rate_limit,
+                      error_rate=args.openai_error_rate, seed=args.seed)
+    # 앱은 import할 때 설정을 읽으므로 상태 파일을 모두 임시 폴더로 돌려 놓고 import한다
+    os.environ.update(
+        OPENAI_API_KEY="bench", OPENAI_BASE_URL=stub.start(),
+        ASSET_MANIFEST_PATH=os.path.join(workdir, "manifest.sqlite3"),
+        UPLOAD_JOURNAL_PATH=os.path.join(workdir, "journal.sqlite3"),
+        SUMMARY_CACHE_PATH=os.path.join(workdir, "summaries.sqlite3"),
+        LINK_INDEX_PATH=os.path.join(workdir, "links.sqlite3"),
+    )
+    if args.workers:
+        os.environ["UPLOAD_CONCURRENCY"] = str(args.workers)
+    import_started = time.perf_counter()
+    profile = importlib.import_module(args.app).PROFILE
+    import_seconds = time.perf_counter() - import_started
+    import uploader
+    from dropbox_stub import DropboxStub
+    from dropbox_utils import BatchCommitter
+    from image_utils import get_process_pool
+    from job_queue import JobQueue
+    from limiter import ThrottledDropbox, get_limiter, limiters
+    from metrics import InstrumentedDropbox, registry
+
+    stub_dbx = DropboxStub(latency=args.dropbox_latency, bandwidth=args.dropbox_bandwidth,
+                           rate_limit=args.dropbox_rate_limit, commit_seconds=args.dropbox_commit_seconds,
+                           error_rate=args.dropbox_error_rate, seed=args.seed)
+    # 앱의 clients.get_dropbox_client와 같은 구성 (재시도와 동시성 조절은 ThrottledDropbox가 한다)
+    dbx = ThrottledDropbox(InstrumentedDropbox(stub_dbx), get_limiter("dropbox", profile.dropbox_max_connections))
+    batch = BatchCommitter(dbx) if uploader.UPLOAD_BATCH_COMMIT else None
+    jobs = JobQueue(os.path.join(workdir, "state"), args.app)
+    inputs = make_inputs(os.path.join(workdir, "inputs"), args.images, args.count, args.asset_mb)
+    for image_path, asset_path in inputs:
+        with open(image_path, "rb") as img:
+            if asset_path is None:
+                jobs.enqueue(img)
+            else:
+                with open(asset_path, "rb") as asset:
+                    jobs.enqueue(img, asset)
+
+    print(f"{args.app}: 이미지 {len(inputs)}장, 동시 작업 {uploader.UPLOAD_CONCURRENCY}, 렌더 워커 {uploader.RENDER_WORKERS}", flush=True)
+    started = time.monotonic()
+    jobs.start(partial(uploader.run_job, profile, dbx, batch), uploader.UPLOAD_CONCURRENCY)
+    while True:
+        rows = jobs.list_jobs(len(inputs))
+        if all(row["status"] in ("done", "failed") for row in rows):
+            break
+        time.sleep(0.2)
+    elapsed = time.monotonic() - started
+
+    # 워커 프로세스를 닫아야 RUSAGE_CHILDREN에 그 최대 RSS가 잡힌다
+    for kind, workers in (("render", uploader.RENDER_WORKERS), ("matting", 1)):
+        get_process_pool(kind, workers).shutdown(wait=True)
+    child_peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    stub.stop()
+
+    latencies = [row["finished"] - row["started"] for row in rows if row["status"] == "done"]
+    failed = [row for row in rows if row["status"] == "failed"]
+    result = {
+        "app": args.app, "images": len(rows), "done": len(latencies), "failed": len(failed),
+        "seconds": round(elapsed, 3), "images_per_min": round(len(latencies) / elapsed * 60, 2),
+        "import_seconds": round(import_seconds, 3),
+        "p50": round(percentile(latencies, 50), 3), "p95": round(percentile(latencies, 95), 3),
+        "peak_rss_mb": round(peak_rss_mb(), 1), "worker_peak_rss_mb": round(child_peak, 1),
+        "calls": dict(sorted(registry.calls.items())),
+        "faults": {**stub_dbx.faults, **{k: v for k, v in stub.calls.items() if k.startswith("chat.")}},
+        "uploaded_mb": round(stub_dbx.uploaded_bytes / 2**20, 1),
+        "limiters": limiters(),
+    }
+
+    print(f"처리량      {result['images_per_min']:.1f}장/분 ({result['done']}장 성공, {result['failed']}장 실패, {elapsed:.1f}s)")
+    print(f"이미지당    p50 {result['p50']:.2f}s  p95 {result['p95']:.2f}s")
+    print(f"최대 RSS    메인 {result['peak_rss_mb']:.1f}MB  워커(가장 큰 것) {result['worker_peak_rss_mb']:.1f}MB")
+    print(f"올린 양     {result['uploaded_mb']:.1f}MB")
+    print(f"앱 import   {result['import_seconds']:.2f}s (자세한 내역은 bench.py importtime)")
+    print("API 호출")
+    for name, n in result["calls"].items():
+        print(f"  {name:<52}{n:>7}")
+    if result["faults"]:
+        print("주입된 장애  " + ", ".join(f"{kind} {n}" for kind, n in result["faults"].items()))
+    for name, state in result["limiters"].items():
+        print(f"동시성 한도  {name} {state['limit']:.1f}/{state['maximum']} (제한 응답 {state['throttles']}회)")
+    for row in failed[:3]:
+        print(f"  실패: {row['image_name']} - {row['error']}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            base = json.load(f)
+        print("기준 대비")
+        for key, label in (("images_per_min", "처리량"), ("p50", "p50"), ("p95", "p95"), ("peak_rss_mb", "메인 RSS"),
+                           ("import_seconds", "앱 import")):
+            if base.get(key):
+                print(f"  {label:<10}{base[key]:>10} -> {result[key]:<10}({(result[key] / base[key] - 1) * 100:+.1f}%)")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+    if not args.keep:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+# ========== IMPORT TIME ==========
+HEAVY_MODULES = ("streamlit", "PIL", "dropbox", "openai", "rembg", "onnxruntime")
+
+def parse_importtime(report: str) -> list[tuple[int, str, int, int]]:
+    # -X importtime 출력을 (깊이, 모듈, 자체 us, 누적 us) 목록으로 바꾼다
+    rows = []
+    for line in report.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((depth, name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+def bench_importtime(args):
+    """새 인터프리터에서 -X importtime으로 앱 모듈을 import 해 보고 오래 걸린 모듈과 무거운 의존성을 보여준다.
+
+    Streamlit 서버가 처음 앱을 열 때의 import 비용이다. 가장 빠른 반복의 결과를 쓴다.
+    """
+    runs = []
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {args.module}"],
+                              cwd=ROOT, capture_output=True, text=True, check=True)
+        runs.append((time.perf_counter() - started, proc.stderr))
+    wall, report = min(runs)
+    rows = parse_importtime(report)
+    total_us = sum(cumulative for depth, _, _, cumulative in rows if depth == 0)
+
+    print(f"{args.module}: 인터프리터 포함 {wall * 1000:.0f}ms, import {total_us / 1000:.0f}ms (모듈 {len(rows)}개)")
+    print(f"\n{'최상위 모듈':<40}{'누적 ms':>10}{'자체 ms':>10}")
+    top_level = sorted((row for row in rows if row[0] == 0), key=lambda row: -row[3])
+    for _, name, self_us, cumulative_us in top_level[:args.top]:
+        print(f"{name:<40}{cumulative_us / 1000:>10.1f}{self_us / 1000:>10.1f}")
+    print(f"\n{'무거운 의존성':<40}{'누적 ms':>10}")
+    loaded = {name: cumulative for _, name, _, cumulative in rows}
+    for name in HEAVY_MODULES:
+        print(f"{name:<40}{(f'{loaded[name] / 1000:.1f}' if name in loaded else '안 불러옴'):>10}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"module": args.module, "wall_ms": round(wall * 1000, 1), "import_ms": round(total_us / 1000, 1),
+                       "heavy_ms": {name: round(loaded[name] / 1000, 1) for name in HEAVY_MODULES if name in loaded}},
+                      f, ensure_ascii=False, indent=2)
+
+def main():
+    parser = argparse.ArgumentParser(description="업로더 파이프라인 성능 측정")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    alpha = sub.add_parser("alpha", help="알파 썸네일의 마스크 해상도별 속도와 원본 해상도 대비 마스크 차이")
+    alpha.add_argument("images", nargs="*", default=DEFAULT_IMAGES)
+    alpha.add_argument("--edges", type=lambda v: [int(x) for x in v.split(",")], default=[0, 1000, 512, 320],
+                       help="비교할 ALPHA_MATTE_EDGE 값들 (0은 원본 해상도)")
+    alpha.add_argument("--size", type=int, default=1000, help="썸네일 긴 변 px")
+    alpha.add_argument("--upscale", type=int, default=0, help="입력을 이 긴 변(px)까지 키워서 측정 (예: 7680)")
+    alpha.add_argument("--repeat", type=int, default=3)
+    alpha.add_argument("--model", default=os.getenv("REMBG_MODEL") or None)
+    alpha.add_argument("--threads", type=int, default=int(os.getenv("REMBG_THREADS", "0")))
+    alpha.set_defaults(func=bench_alpha)
+
+    encoders = sub.add_parser("encoders", help="인코더 프로파일별 인코딩 시간, 출력 크기, PSNR")
+    encoders.add_argument("images", nargs="*", default=DEFAULT_IMAGES)
+    encoders.add_argument("--formats", type=lambda v: v.upper().split(","), default=["JPEG", "WEBP"])
+    encoders.add_argument("--size", type=int, default=1000, help="썸네일 긴 변 px")
+    encoders.add_argument("--cutout", action="store_true", help="배경을 지운 RGBA 썸네일로 측정 (알파 WebP용, rembg 필요)")
+    encoders.add_argument("--repeat", type=int, default=3)
+    encoders.add_argument("--model", default=os.getenv("REMBG_MODEL") or None)
+    encoders.add_argument("--threads", type=int, default=int(os.getenv("REMBG_THREADS", "0")))
+    encoders.set_defaults(func=bench_encoders)
+
+    pipeline = sub.add_parser("pipeline", help="스텁 Dropbox/OpenAI로 작업 큐 전체를 돌려 처리량, 지연, API 호출 수, 최대 RSS 측정")
+    pipeline.add_argument("images", nargs="*", default=DEFAULT_IMAGES, help="복사해 쓸 원본 이미지")
+    pipeline.add_argument("--app", default="app2", choices=["app2", "app3"])
+    pipeline.add_argument("--count", type=int, default=40, help="처리할 이미지 수 (원본을 돌려 가며 복사)")
+    pipeline.add_argument("--asset-mb", type=lambda v: [float(x) for x in v.split(",")], default=[0, 2, 32],
+                          help="이미지마다 차례로 붙일 합성 자산 크기(MB), 0은 자산 없음")
+    pipeline.add_argument("--workers", type=int, default=0, help="동시 작업 수 (0이면 앱의 UPLOAD_CONCURRENCY)")
+    pipeline.add_argument("--dropbox-latency", type=float, default=0.15, help="Dropbox 호출마다 더할 지연(초)")
+    pipeline.add_argument("--dropbox-bandwidth", type=float, default=25.0, help="업로드 속도 MB/s (0이면 무제한)")
+    pipeline.add_argument("--dropbox-rate-limit", type=float, default=0.0, help="초당 허용 Dropbox 호출 수 (0이면 무제한)")
+    pipeline.add_argument("--dropbox-commit-seconds", type=float, default=0.0,
+                          help="커밋이 쓰기 잠금을 잡는 시간. 겹치면 too_many_write_operations (0이면 경합 없음)")
+    pipeline.add_argument("--dropbox-error-rate", type=float, default=0.0, help="Dropbox 호출이 500으로 실패할 확률")
+    pipeline.add_argument("--openai-latency", type=float, default=2.0, help="채팅 요청마다 더할 지연(초)")
+    pipeline.add_argument("--openai-rate-limit", type=float, default=0.0, help="초당 허용 채팅 요청 수 (0이면 무제한)")
+    pipeline.add_argument("--openai-error-rate", type=float, default=0.0, help="채팅 요청이 500으로 실패할 확률")
+    pipeline.add_argument("--seed", type=int, default=0, help="오류 주입 난수 시드")
+    pipeline.add_argument("--json", help="결과를 JSON으로 저장할 파일 (다음 실행의 --baseline으로 쓴다)")
+    pipeline.add_argument("--baseline", help="비교할 이전 --json 결과")
+    pipeline.add_argument("--keep", action="store_true", help="임시 폴더(입력, 상태 DB)를 지우지 않는다")
+    pipeline.set_defaults(func=bench_pipeline)
+
+    importtime = sub.add_parser("importtime", help="앱 모듈의 import 시간 (-X importtime) 내역")
+    importtime.add_argument("--module", default="app3", help="import 해 볼 모듈")
+    importtime.add_argument("--top", type=int, default=15, help="보여줄 최상위 모듈 수")
+    importtime.add_argument("--repeat", type=int, default=3)
+    importtime.add_argument("--json", help="결과를 JSON으로 저장할 파일")
+    importtime.set_defaults(func=bench_importtime)
+
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import threading
+from functools import lru_cache
+from typing import TYPE_CHECKING, Callable
+
+from instance_cache import cached_instance
+from limiter import ThrottledDropbox, get_limiter
+from metrics import InstrumentedDropbox
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI, OpenAI
+
+# dropbox와 openai SDK는 불러오는 데만 1초 가까이 걸리므로 모듈 맨 위가 아니라 클라이언트를 처음 만들 때 import 한다.
+# 앱은 첫 화면을 그린 뒤 warm_up()으로 백그라운드에서 미리 만들어 둔다
+
+# ========== DROPBOX ==========
+@lru_cache(maxsize=None)
+def _shared_dropbox_class():
+    import dropbox
+
+    class SharedDropbox(dropbox.Dropbox):
+        """여러 스레드가 같이 쓰는 Dropbox 클라이언트.
+
+        SDK는 요청마다 액세스 토큰이 만료 5분 전인지 보고 갱신하는데, 여러 스레드가 동시에 만료를 보면
+        저마다 리프레시 토큰 교환을 한다. 한 스레드만 갱신하고 나머지는 기다렸다가 새 토큰을 쓰도록 잠근다.
+        """
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self._refresh_lock = threading.Lock()
+
+        def check_and_refresh_access_token(self):
+            with self._refresh_lock:
+                super().check_and_refresh_access_token()
+
+    return SharedDropbox
+
+@cached_instance(lambda app_key, app_secret, refresh_token, max_connections=8: (app_key, refresh_token))
+def get_dropbox_client(app_key: str | None, app_secret: str | None, refresh_token: str | None,
+                       max_connections: int = 8) -> ThrottledDropbox:
+    """같은 자격 증명에는 프로세스에서 하나의 클라이언트를 돌려준다.
+
+    Streamlit 재실행이나 작업 워커마다 새로 만들면 그때마다 토큰 교환과 TLS 연결을 새로 하므로,
+    keep-alive 연결을 max_connections개까지 들고 있는 세션 하나를 계속 쓴다 (처음 만들 때의 값이 쓰인다).
+    동시 요청 수는 "dropbox" limiter가 max_connections 안에서 제한 응답에 맞춰 조절한다.
+    """
+    import dropbox
+
+    client = _shared_dropbox_class()(
+        oauth2_refresh_token=refresh_token,
+        app_key=app_key,
+        app_secret=app_secret,
+        session=dropbox.create_session(max_connections=max_connections),
+        # SDK는 커밋까지 5xx를 다시 보내고 429는 끝없이 다시 보내므로 끄고 ThrottledDropbox에서 재시도한다
+        max_retries_on_error=0,
+        max_retries_on_rate_limit=0,
+    )
+    # 시도마다 측정되도록 InstrumentedDropbox를 안쪽에 둔다
+    return ThrottledDropbox(InstrumentedDropbox(client), get_limiter("dropbox", max_connections))
+
+# ========== OPENAI ==========
+def _limits(max_connections: int):
+    # SDK 버전에 따라 httpx 또는 httpx2를 쓰므로 기본값과 같은 Limits 클래스로 만든다
+    from openai import DEFAULT_CONNECTION_LIMITS
+
+    return type(DEFAULT_CONNECTION_LIMITS)(max_connections=max_connections, max_keepalive_connections=max_connections)
+
+@lru_cache(maxsize=None)
+def get_openai_client(api_key: str | None, base_url: str | None = None, max_connections: int = 4) -> "OpenAI":
+    # 동기 클라이언트 (Batch API 등). 같은 설정이면 연결 풀째로 다시 쓴다
+    from openai import DefaultHttpxClient, OpenAI
+
+    return OpenAI(api_key=api_key, base_url=base_url, http_client=DefaultHttpxClient(limits=_limits(max_connections)))
+
+def create_async_openai_client(api_key: str | None, base_url: str | None = None, max_connections: int = 4,
+                               max_retries: int = 0) -> "AsyncOpenAI":
+    # 비동기 클라이언트의 연결은 처음 쓰는 이벤트 루프에 묶이므로 캐시하지 않고 루프 주인(Summarizer)이 하나 만들어 둔다
+    from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+    return AsyncOpenAI(api_key=api_key, base_url=base_url, max_retries=max_retries,
+                       http_client=DefaultAsyncHttpxClient(limits=_limits(max_connections)))
+
+# ========== WARM-UP ==========
+@cached_instance(lambda name, *tasks: name)
+def warm_up(name: str, *tasks: Callable[[], object]) -> threading.Thread:
+    """tasks를 백그라운드 스레드에서 차례로 실행한다. 프로세스에서 name별로 한 번만 띄운다.
+
+    SDK import, 클라이언트 생성, 모델 로딩처럼 첫 작업을 늦추는 준비를 화면을 그린 뒤로 미루는 데 쓴다.
+    실패한 준비는 건너뛴다. 실제로 필요할 때 다시 시도되고 그때 오류가 작업 메시지로 드러난다.
+    """
+    def run():
+        for task in tasks:
+            try:
+                task()
+            except Exception:
+                pass
+
+    thread = threading.Thread(target=run, name=f"warm-up-{name}", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,260 @@
+"""앱이 쓰는 dropbox.Dropbox 메서드를 메모리 안에서 흉내 내는 스텁 클라이언트.
+
+파일 내용은 보관하지 않고 경로, 크기, content_hash, 공유 링크만 기억한다. 벤치마크(bench.py pipeline)와
+테스트(tests/)에서 실제 Dropbox 대신 넘겨 API 할당량 없이 파이프라인 전체를 돌려 보는 데 쓴다.
+
+    dbx = DropboxStub(latency=0.1, bandwidth=20, rate_limit=50, commit_seconds=0.05, error_rate=0.01)
+"""
+import hashlib
+import posixpath
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+
+from dropbox import auth
+from dropbox.exceptions import ApiError, InternalServerError, RateLimitError
+from dropbox.files import (
+    CommitInfo, FileMetadata, ListFolderResult, UploadSessionAppendError, UploadSessionFinishBatchResult,
+    UploadSessionFinishBatchResultEntry, UploadSessionFinishError, UploadSessionLookupError,
+    UploadSessionOffsetError, UploadSessionStartResult, UploadSessionType,
+)
+from dropbox.sharing import FileLinkMetadata, LinkPermissions, ListSharedLinksResult
+
+BLOCK_SIZE = 4 * 1024 * 1024  # content_hash를 계산하는 블록 크기
+PAGE_SIZE = 500  # 목록 API 한 번에 돌려주는 항목 수
+
+# ========== UPLOAD SESSION ==========
+class _Session:
+    """업로드 세션 하나. 내용 대신 4MB 블록별 sha256만 모아 두었다가 finish 때 content_hash를 만든다."""
+
+    def __init__(self, concurrent: bool):
+        self.concurrent = concurrent
+        self.blocks: dict[int, bytes] = {}
+        self.tail = b""  # 블록 하나를 채우지 못하고 남은 앞쪽 데이터
+        self.tail_offset = 0
+        self.size = 0
+        self.closed = False
+
+    def absorb(self, offset: int, data: bytes):
+        if self.tail and offset == self.tail_offset + len(self.tail):
+            offset, data = self.tail_offset, self.tail + data
+            self.tail = b""
+        whole = len(data) - len(data) % BLOCK_SIZE
+        for start in range(0, whole, BLOCK_SIZE):
+            self.blocks[offset + start] = hashlib.sha256(data[start:start + BLOCK_SIZE]).digest()
+        if whole < len(data):
+            self.tail, self.tail_offset = data[whole:], offset + whole
+
+    def content_hash(self) -> str:
+        blocks = dict(self.blocks)
+        if self.tail:
+            blocks[self.tail_offset] = hashlib.sha256(self.tail).digest()
+        return hashlib.sha256(b"".join(blocks[offset] for offset in sorted(blocks))).hexdigest()
+
+def _lookup_error(kind, correct_offset: int | None = None):
+    # append는 UploadSessionAppendError, finish는 lookup_failed로 감싼 UploadSessionLookupError를 받는다
+    if correct_offset is not None:
+        error = kind.incorrect_offset(UploadSessionOffsetError(correct_offset=correct_offset))
+    else:
+        error = kind.not_found
+    if kind is UploadSessionLookupError:
+        error = UploadSessionFinishError.lookup_failed(error)
+    return ApiError(uuid.uuid4().hex, error, None, None)
+
+# ========== STUB CLIENT ==========
+class DropboxStub:
+    """dropbox.Dropbox 대신 쓰는 메모리 내 클라이언트.
+
+    - latency: 호출마다 더하는 지연(초), bandwidth: 올리는 데이터에 적용할 속도(MB/s, 0이면 무제한)
+    - rate_limit: 초당 허용 호출 수. 넘으면 RateLimitError(too_many_requests)를 던진다 (0이면 무제한)
+    - commit_seconds: 커밋 한 번이 네임스페이스 쓰기 잠금을 잡는 시간. 그동안 들어온 다른 커밋은
+      RateLimitError(too_many_write_operations)를 받는다 (0이면 경합 없음)
+    - error_rate: 호출이 처리되기 전에 InternalServerError(500)로 실패할 확률
+
+    calls에 메서드별 호출 수, uploaded_bytes에 받은 바이트 수가 쌓인다.
+    """
+
+    def __init__(self, latency: float = 0.0, bandwidth: float = 0.0, rate_limit: float = 0.0,
+                 commit_seconds: float = 0.0, error_rate: float = 0.0, seed: int | None = None):
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.rate_limit = rate_limit
+        self.commit_seconds = commit_seconds
+        self.error_rate = error_rate
+        self.calls: dict[str, int] = {}
+        self.faults: dict[str, int] = {}
+        self.uploaded_bytes = 0
+        self._random = random.Random(seed)
+        self._recent: deque[float] = deque()
+        self._files: dict[str, FileMetadata] = {}  # path_lower -> 메타데이터
+        self._changes: list[FileMetadata] = []  # list_folder_continue용 변경 기록
+        self._links: dict[str, FileLinkMetadata] = {}
+        self._sessions: dict[str, _Session] = {}
+        self._write_busy_until = 0.0
+        self._lock = threading.Lock()
+
+    # ----- 지연, 제한, 오류 주입 -----
+    def _call(self, method: str, payload: int = 0, commit: bool = False):
+        with self._lock:
+            self.calls[method] = self.calls.get(method, 0) + 1
+            now = time.monotonic()
+            if self.rate_limit:
+                while self._recent and now - self._recent[0] >= 1.0:
+                    self._recent.popleft()
+                if len(self._recent) >= self.rate_limit:
+                    self._fault("too_many_requests")
+                    raise RateLimitError(uuid.uuid4().hex, auth.RateLimitError(auth.RateLimitReason.too_many_requests, 1), 1)
+                self._recent.append(now)
+            if self.error_rate and self._random.random() < self.error_rate:
+                self._fault("internal_error")
+                raise InternalServerError(uuid.uuid4().hex, 500, "stub: injected error")
+            if commit and self.commit_seconds:
+                if now < self._write_busy_until:
+                    self._fault("too_many_write_operations")
+                    raise RateLimitError(uuid.uuid4().hex,
+                                         auth.RateLimitError(auth.RateLimitReason.too_many_write_operations, 1), 1)
+                self._write_busy_until = now + self.commit_seconds
+            self.uploaded_bytes += payload
+        delay = self.latency + (payload / (self.bandwidth * 2**20) if self.bandwidth else 0.0)
+        if commit:
+            delay += self.commit_seconds
+        if delay:
+            time.sleep(delay)
+
+    def _fault(self, kind: str):
+        self.faults[kind] = self.faults.get(kind, 0) + 1
+
+    def _commit(self, session: _Session, commit) -> FileMetadata:
+        # autorename이면 Dropbox처럼 "이름 (1).ext" 식으로 비켜 간다
+        with self._lock:
+            path = commit.path
+            stem, ext = posixpath.splitext(path)
+            counter = 1
+            while path.lower() in self._files:
+                if not commit.autorename:
+                    raise ApiError(uuid.uuid4().hex, "path/conflict/file", None, None)
+                path = f"{stem} ({counter}){ext}"
+                counter += 1
+            metadata = FileMetadata(
+                name=posixpath.basename(path), id=f"id:{uuid.uuid4().hex[:16]}", path_lower=path.lower(),
+                path_display=path, content_hash=session.content_hash(), size=session.size,
+                rev=uuid.uuid4().hex[:16],
+            )
+            self._files[path.lower()] = metadata
+            self._changes.append(metadata)
+        return metadata
+
+    def _session(self, cursor, kind, allow_closed: bool = False) -> _Session:
+        with self._lock:
+            session = self._sessions.get(cursor.session_id)
+        if session is None or (session.closed and not allow_closed):
+            raise _lookup_error(kind)
+        if not session.concurrent and cursor.offset != session.size:
+            raise _lookup_error(kind, session.size)
+        return session
+
+    # ----- files -----
+    def files_upload(self, f: bytes, path: str, mode=None, autorename: bool = False, **kwargs) -> FileMetadata:
+        self._call("files_upload", len(f), commit=True)
+        session = _Session(concurrent=False)
+        session.absorb(0, f)
+        session.size = len(f)
+        return self._commit(session, CommitInfo(path=path, autorename=autorename))
+
+    def files_upload_session_start(self, f: bytes, close: bool = False, session_type=None, **kwargs):
+        self._call("files_upload_session_start", len(f))
+        concurrent = session_type is not None and session_type == UploadSessionType.concurrent
+        if concurrent and f:
+            raise ApiError(uuid.uuid4().hex, "concurrent_session_data_not_allowed", None, None)
+        session = _Session(concurrent)
+        session.absorb(0, f)
+        session.size = len(f)
+        session.closed = close
+        session_id = uuid.uuid4().hex
+        with self._lock:
+            self._sessions[session_id] = session
+        return UploadSessionStartResult(session_id=session_id)
+
+    def files_upload_session_append_v2(self, f: bytes, cursor, close: bool = False):
+        self._call("files_upload_session_append_v2", len(f))
+        session = self._session(cursor, UploadSessionAppendError)
+        with self._lock:
+            session.absorb(cursor.offset, f)
+            session.size = max(session.size, cursor.offset + len(f)) if session.concurrent else session.size + len(f)
+            session.closed = session.closed or close
+
+    def files_upload_session_finish(self, f: bytes, cursor, commit) -> FileMetadata:
+        self._call("files_upload_session_finish", len(f), commit=True)
+        session = self._session(cursor, UploadSessionLookupError, allow_closed=True)
+        with self._lock:
+            if f:
+                session.absorb(cursor.offset, f)
+                session.size += len(f)
+            del self._sessions[cursor.session_id]
+        return self._commit(session, commit)
+
+    def files_upload_session_finish_batch_v2(self, entries) -> UploadSessionFinishBatchResult:
+        self._call("files_upload_session_finish_batch_v2", commit=True)
+        results = []
+        for entry in entries:
+            with self._lock:
+                session = self._sessions.pop(entry.cursor.session_id, None)
+            if session is None:
+                results.append(UploadSessionFinishBatchResultEntry.failure(
+                    UploadSessionFinishError.lookup_failed(UploadSessionLookupError.not_found)))
+                continue
+            results.append(UploadSessionFinishBatchResultEntry.success(self._commit(session, entry.commit)))
+        return UploadSessionFinishBatchResult(entries=results)
+
+    def files_list_folder(self, path: str, **kwargs) -> ListFolderResult:
+        # 스텁에서는 파일이 지워지거나 덮어써지지 않으므로 전체 목록은 처음부터 본 변경 기록과 같다
+        self._call("files_list_folder")
+        return self._list(path.rstrip("/").lower() + "/", 0, 0)
+
+    def files_list_folder_continue(self, cursor: str) -> ListFolderResult:
+        self._call("files_list_folder_continue")
+        prefix, position, skip = cursor.rsplit("|", 2)
+        return self._list(prefix, int(position), int(skip))
+
+    def _list(self, prefix: str, position: int, skip: int) -> ListFolderResult:
+        # 커서는 "폴더|변경 기록 위치|건너뛸 항목 수". 다음 페이지가 있으면 같은 위치에서 skip만 늘린다
+        with self._lock:
+            entries = [m for m in self._changes[position:]
+                       if m.path_lower.startswith(prefix) and "/" not in m.path_lower[len(prefix):]]
+            end = len(self._changes)
+        has_more = skip + PAGE_SIZE < len(entries)
+        cursor = f"{prefix}|{position}|{skip + PAGE_SIZE}" if has_more else f"{prefix}|{end}|0"
+        return ListFolderResult(entries=entries[skip:skip + PAGE_SIZE], cursor=cursor, has_more=has_more)
+
+    # ----- sharing -----
+    def sharing_list_shared_links(self, path: str | None = None, cursor: str | None = None,
+                                  direct_only: bool | None = None) -> ListSharedLinksResult:
+        self._call("sharing_list_shared_links")
+        with self._lock:
+            if path is not None:
+                link = self._links.get(path.lower())
+                return ListSharedLinksResult(links=[link] if link else [], has_more=False, cursor="")
+            links = list(self._links.values())
+        start = int(cursor or 0)
+        has_more = start + PAGE_SIZE < len(links)
+        return ListSharedLinksResult(links=links[start:start + PAGE_SIZE], has_more=has_more,
+                                     cursor=str(start + PAGE_SIZE) if has_more else "")
+
+    def sharing_create_shared_link_with_settings(self, path: str, settings=None) -> FileLinkMetadata:
+        self._call("sharing_create_shared_link_with_settings")
+        with self._lock:
+            metadata = self._files.get(path.lower())
+            if metadata is None:
+                raise ApiError(uuid.uuid4().hex, "path/not_found", None, None)
+            # 목록 응답(ListSharedLinksResult)은 필수 필드를 검사하므로 실제 응답처럼 모두 채운다
+            now = datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+            link = FileLinkMetadata(
+                url=f"https://www.dropbox.com/scl/fi/{uuid.uuid4().hex[:20]}/{metadata.name}?rlkey=stub&dl=0",
+                name=metadata.name, path_lower=metadata.path_lower, id=metadata.id, size=metadata.size,
+                rev=metadata.rev, client_modified=now, server_modified=now, link_permissions=LinkPermissions(can_revoke=True),
+            )
+            self._links[metadata.path_lower] = link
+        return link
@@ -0,0 +1,434 @@
+import contextvars
+import hashlib
+import os
+import posixpath
+import threading
+import time
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Callable
+
+from link_index import LinkIndex
+from metrics import run_in_context, span
+from upload_journal import UploadJournal
+
+if TYPE_CHECKING:
+    from dropbox.exceptions import ApiError
+    from dropbox.files import CommitInfo, UploadSessionFinishArg
+
+# dropbox SDK(특히 dropbox.files)는 불러오는 데 오래 걸리므로 앱 첫 화면을 늦추지 않게 쓰는 함수 안에서 import 한다
+
+INDEX_REFRESH_INTERVAL = 30.0  # 초. 이 간격이 지나면 cursor로 변경분만 다시 받아온다
+BATCH_MAX_ENTRIES = 1000  # finish_batch 한 번에 커밋할 수 있는 최대 파일 수
+BATCH_MAX_DELAY = 0.5  # 초. 첫 파일이 들어온 뒤 이만큼 모아서 한 번에 커밋한다
+CHUNK_UNIT = 4 * 1024 * 1024  # 동시 업로드 세션의 청크 크기는 이 값의 배수여야 한다
+
+# ========== FOLDER INDEX ==========
+class FolderIndex:
+    """Dropbox 폴더 하나의 파일명과 content_hash 목록을 로컬에 들고 있으면서
+    겹치지 않는 이름을 내어주고, 같은 내용의 파일이 이미 있는지 알려준다.
+
+    처음 한 번 files_list_folder로 전체 목록을 받고, 이후에는 cursor로 변경분만 반영한다.
+    다른 클라이언트와의 경합은 업로드 시 autorename=True가 서버 쪽에서 마저 해결한다.
+    """
+
+    def __init__(self, dbx, folder: str):
+        self.dbx = dbx
+        self.folder = folder.rstrip("/")
+        self._names: set[str] = set()  # Dropbox 경로는 대소문자를 구분하지 않으므로 소문자로 보관
+        self._hash_by_name: dict[str, str] = {}
+        self._path_by_hash: dict[str, str] = {}
+        self._cursor = None
+        self._refreshed_at = None
+        self._lock = threading.Lock()
+
+    def _apply(self, entries):
+        from dropbox.files import DeletedMetadata
+
+        for entry in entries:
+            name = entry.name.lower()
+            if isinstance(entry, DeletedMetadata):
+                self._names.discard(name)
+                content_hash = self._hash_by_name.pop(name, None)
+                if content_hash and self._path_by_hash.get(content_hash, "").lower() == entry.path_lower:
+                    del self._path_by_hash[content_hash]
+                continue
+            self._names.add(name)
+            content_hash = getattr(entry, "content_hash", None)  # FolderMetadata에는 없다
+            if content_hash:
+                self._hash_by_name[name] = content_hash
+                self._path_by_hash.setdefault(content_hash, entry.path_display)
+
+    def _ensure_fresh(self):
+        if self._refreshed_at is None or time.monotonic() - self._refreshed_at > INDEX_REFRESH_INTERVAL:
+            self._refresh()
+
+    def _refresh(self):
+        from dropbox.exceptions import ApiError
+
+        try:
+            if self._cursor is None:
+                result = self.dbx.files_list_folder(self.folder)
+            else:
+                result = self.dbx.files_list_folder_continue(self._cursor)
+        except ApiError as e:
+            if self._cursor is not None and e.error.is_reset():
+                self._cursor = None
+                return self._refresh()
+            if self._cursor is None and e.error.is_path() and e.error.get_path().is_not_found():
+                # 아직 폴더가 없으면 첫 업로드 때 만들어진다
+                self._refreshed_at = time.monotonic()
+                return
+            raise
+        self._apply(result.entries)
+        while result.has_more:
+            result = self.dbx.files_list_folder_continue(result.cursor)
+            self._apply(result.entries)
+        self._cursor = result.cursor
+        self._refreshed_at = time.monotonic()
+
+    def refresh(self):
+        with self._lock:
+            self._refresh()
+
+    def find_by_hash(self, content_hash: str) -> str | None:
+        with self._lock:
+            self._ensure_fresh()
+            return self._path_by_hash.get(content_hash)
+
+    def files(self) -> dict[str, str]:
+        # {소문자 경로: content_hash}. 폴더는 빠진다
+        with self._lock:
+            self._ensure_fresh()
+            folder = self.folder.lower()
+            return {f"{folder}/{name}": content_hash for name, content_hash in self._hash_by_name.items()}
+
+    def record(self, metadata):
+        # 방금 커밋한 파일을 바로 반영한다 (autorename으로 이름이 바뀌었을 수도 있다)
+        with self._lock:
+            self._apply([metadata])
+
+    def reserve(self, stem: str, ext: str, max_tries: int = 1000) -> str:
+        with self._lock:
+            self._ensure_fresh()
+            name = f"{stem}.{ext}"
+            for counter in range(1, max_tries + 1):
+                if name.lower() not in self._names:
+                    self._names.add(name.lower())
+                    return f"{self.folder}/{name}"
+                name = f"{stem}_{counter}.{ext}"
+        raise RuntimeError(f"FolderIndex.reserve: too many conflicts for {self.folder}/{stem}.{ext}, aborting.")
+
+    def release(self, path: str):
+        # 업로드가 실패해 커밋되지 않은 예약 이름을 돌려놓는다. 재시도는 같은 이름을 다시 받는다
+        name = posixpath.basename(path).lower()
+        with self._lock:
+            if name not in self._hash_by_name:
+                self._names.discard(name)
+
+_folder_indexes = weakref.WeakKeyDictionary()
+_folder_indexes_lock = threading.Lock()
+
+def get_folder_index(dbx, folder: str) -> FolderIndex:
+    with _folder_indexes_lock:
+        indexes = _folder_indexes.setdefault(dbx, {})
+        key = folder.rstrip("/").lower()
+        if key not in indexes:
+            indexes[key] = FolderIndex(dbx, folder)
+        return indexes[key]
+
+# ========== UPLOAD ==========
+class ChunkReader:
+    """bytes류 버퍼나 파일 객체에서 임의 위치의 청크를 하나씩만 꺼내 읽는다.
+
+    Dropbox SDK는 요청 본문으로 bytes만 받으므로 청크 하나만큼의 복사는 피할 수 없지만,
+    파일 전체를 read()로 한 번 더 메모리에 올리거나 슬라이스를 두 번 만들지는 않는다.
+    위치를 인자로 받아 읽으므로 여러 스레드가 같은 원본을 동시에 읽어도 안전하다.
+    """
+
+    def __init__(self, source):
+        self._view = None
+        self._file = None
+        self._lock = threading.Lock()
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            self._view = memoryview(source)
+        elif hasattr(source, "getbuffer"):
+            # BytesIO / Streamlit UploadedFile: 내부 버퍼를 복사 없이 빌려 쓴다
+            self._view = source.getbuffer()
+        elif hasattr(source, "fileno"):
+            self._file = source
+            self.size = os.fstat(source.fileno()).st_size
+        else:
+            self._view = memoryview(source.read())
+        if self._view is not None:
+            self.size = self._view.nbytes
+
+    def read(self, offset: int, length: int) -> bytes:
+        if self._view is not None:
+            return self._view[offset:offset + length].tobytes()
+        if hasattr(os, "pread"):
+            return os.pread(self._file.fileno(), length, offset)
+        with self._lock:
+            self._file.seek(offset)
+            return self._file.read(length)
+
+    def close(self):
+        if self._view is not None:
+            self._view.release()
+
+def dropbox_content_hash(source: ChunkReader) -> str:
+    # https://www.dropbox.com/developers/reference/content-hash : 4MiB 블록별 SHA-256을 이어 붙여 다시 SHA-256
+    block_hashes = b"".join(
+        hashlib.sha256(source.read(offset, CHUNK_UNIT)).digest() for offset in range(0, source.size, CHUNK_UNIT)
+    )
+    return hashlib.sha256(block_hashes).hexdigest()
+
+def content_hash_of(data) -> str:
+    source = ChunkReader(data)
+    try:
+        return dropbox_content_hash(source)
+    finally:
+        source.close()
+
+def _session_lookup_error(e: "ApiError"):
+    from dropbox.files import UploadSessionAppendError, UploadSessionFinishError, UploadSessionLookupError
+
+    error = e.error
+    if isinstance(error, UploadSessionFinishError):
+        return error.get_lookup_failed() if error.is_lookup_failed() else None
+    if isinstance(error, (UploadSessionLookupError, UploadSessionAppendError)):
+        return error
+    return None
+
+def upload_with_chunks(dbx_client, data, dropbox_path: str, batch: "BatchCommitter | None" = None,
+                       chunk_size: int = CHUNK_UNIT, parallelism: int = 1,
+                       report: Callable[[str], None] | None = None, journal: UploadJournal | None = None,
+                       content_hash: str | None = None, journal_key: str | None = None):
+    # data는 bytes류 버퍼나 바이너리 파일 객체 모두 가능하며, 한 번에 청크 하나만 메모리에 올린다.
+    # 이름 선점 후에도 다른 업로더와 겹칠 수 있으므로 서버 쪽 autorename으로 마무리하고 실제 경로를 돌려준다.
+    # journal을 주면 여러 청크로 나뉘는 업로드의 세션을 기록해 두었다가 재시도 때 이어서 올린다.
+    # 세션은 경로와 무관하고 경로는 finish 때 정해지므로, 재시도에서 다른 이름을 받아도 journal_key가 같으면 잇는다
+    from dropbox.files import CommitInfo, WriteMode
+
+    source = ChunkReader(data)
+    try:
+        total = source.size
+        if total <= chunk_size:
+            payload = data if isinstance(data, bytes) else source.read(0, total)
+            if batch is not None:
+                return batch.upload(payload, dropbox_path)
+            return dbx_client.files_upload(payload, dropbox_path, mode=WriteMode.add, autorename=True)
+
+        commit = CommitInfo(path=dropbox_path, mode=WriteMode.add, autorename=True)
+        if journal is not None:
+            key = journal_key or f"{content_hash or dropbox_content_hash(source)}:{dropbox_path.lower()}"
+        else:
+            key = None
+        started = time.monotonic()
+        if parallelism > 1:
+            metadata = _upload_concurrent_session(dbx_client, source, commit, chunk_size, parallelism, journal, key)
+        else:
+            metadata = _upload_sequential_session(dbx_client, source, commit, chunk_size, journal, key)
+    finally:
+        source.close()
+    if report is not None:
+        elapsed = max(time.monotonic() - started, 1e-6)
+        report(f"{metadata.name} 업로드 완료 ({total / 2**20:.1f}MB, {total / 2**20 / elapsed:.1f} MB/s)")
+    return metadata
+
+def upload_if_new(dbx_client, data, base_path: str, ext: str, content_hash: str | None = None,
+                  link_index: LinkIndex | None = None, **upload_kwargs) -> str:
+    """같은 content_hash의 파일이 폴더에 이미 있으면 업로드를 건너뛰고 그 경로를, 없으면 새로 올린 경로를 돌려준다.
+
+    link_index를 주면 새로 올린 파일의 경로, content_hash, 크기를 기록해 둔다.
+    """
+    folder, stem = posixpath.split(base_path)
+    index = get_folder_index(dbx_client, folder)
+    content_hash = content_hash or content_hash_of(data)
+    existing = index.find_by_hash(content_hash)
+    if existing is not None:
+        return existing
+    with span("reserve_path"):
+        path = index.reserve(stem, ext)
+    try:
+        with span("upload_with_chunks"):
+            # 저널은 예약된 이름이 아니라 요청한 경로로 찾는다. 실패 뒤 재시도가 다른 이름을 받아도 세션을 잇는다
+            metadata = upload_with_chunks(dbx_client, data, path, content_hash=content_hash,
+                                          journal_key=f"{content_hash}:{base_path.lower()}.{ext.lower()}",
+                                          **upload_kwargs)
+    except BaseException:
+        index.release(path)
+        raise
+    index.record(metadata)
+    if link_index is not None:
+        link_index.record_file(metadata)
+    return metadata.path_display
+
+def _upload_sequential_session(dbx_client, source: ChunkReader, commit: "CommitInfo", chunk_size: int,
+                               journal: UploadJournal | None = None, key: str | None = None):
+    from dropbox.exceptions import ApiError
+    from dropbox.files import UploadSessionCursor
+
+    total = source.size
+    entry = journal.get(key) if journal is not None else None
+    resumed = entry is not None and entry["kind"] == "sequential"
+    if resumed:
+        session_id, offset, chunk_size = entry["session_id"], entry["offset"], entry["chunk_size"]
+    else:
+        first = source.read(0, chunk_size)
+        session_id = dbx_client.files_upload_session_start(first).session_id
+        offset = len(first)
+        if journal is not None:
+            journal.start(key, session_id, "sequential", total, chunk_size, offset)
+    while True:
+        end = min(offset + chunk_size, total)
+        chunk = source.read(offset, end - offset)
+        cursor = UploadSessionCursor(session_id=session_id, offset=offset)
+        try:
+            if end < total:
+                dbx_client.files_upload_session_append_v2(chunk, cursor)
+            else:
+                metadata = dbx_client.files_upload_session_finish(chunk, cursor, commit)
+        except ApiError as e:
+            lookup = _session_lookup_error(e)
+            if lookup is not None and lookup.is_incorrect_offset():
+                # 응답을 받기 전에 끊긴 청크가 실제로는 반영됐을 수 있으므로 서버가 알려준 위치부터 잇는다
+                offset = lookup.get_incorrect_offset().correct_offset
+                continue
+            if lookup is not None and resumed:
+                # 저널의 세션이 만료됐거나 닫혔으면 버리고 처음부터 다시 올린다
+                journal.finish(key)
+                return _upload_sequential_session(dbx_client, source, commit, chunk_size, journal, key)
+            raise
+        if end < total:
+            offset = end
+            if journal is not None:
+                journal.advance(key, offset)
+        else:
+            if journal is not None:
+                journal.finish(key)
+            return metadata
+
+def _upload_concurrent_session(dbx_client, source: ChunkReader, commit: "CommitInfo", chunk_size: int, parallelism: int,
+                               journal: UploadJournal | None = None, key: str | None = None):
+    # 동시 세션은 start/finish에 데이터를 실을 수 없고, 마지막 조각만 close=True로 보낸다.
+    # 닫은 뒤에 도착한 조각은 거절되므로 닫는 조각은 나머지가 모두 반영된 다음에 따로 보낸다
+    from dropbox.exceptions import ApiError
+    from dropbox.files import UploadSessionCursor, UploadSessionType
+
+    if chunk_size % CHUNK_UNIT:
+        raise ValueError(f"chunk_size는 {CHUNK_UNIT}의 배수여야 합니다: {chunk_size}")
+    total = source.size
+    entry = journal.get(key) if journal is not None else None
+    resumed = entry is not None and entry["kind"] == "concurrent"
+    if resumed:
+        session_id, chunk_size, acked = entry["session_id"], entry["chunk_size"], set(entry["acked"])
+    else:
+        session_id = dbx_client.files_upload_session_start(b"", session_type=UploadSessionType.concurrent).session_id
+        acked = set()
+        if journal is not None:
+            journal.start(key, session_id, "concurrent", total, chunk_size)
+    offsets = range(0, total, chunk_size)
+    last = offsets[-1]
+
+    def append(offset: int):
+        # 청크는 전송 직전에 읽으므로 동시에 메모리에 있는 양은 parallelism개 청크로 제한된다
+        cursor = UploadSessionCursor(session_id=session_id, offset=offset)
+        dbx_client.files_upload_session_append_v2(source.read(offset, chunk_size), cursor, close=offset == last)
+        if journal is not None:
+            journal.advance(key, offset)
+
+    try:
+        context = contextvars.copy_context()
+        with ThreadPoolExecutor(max_workers=parallelism) as pool:
+            list(pool.map(lambda offset: run_in_context(context, append, offset),
+                          [offset for offset in offsets if offset != last and offset not in acked]))
+        # 풀의 스레드(와 그 앞의 limiter)는 보낸 순서대로 도착한다는 보장이 없다
+        if last not in acked:
+            append(last)
+        cursor = UploadSessionCursor(session_id=session_id, offset=total)
+        metadata = dbx_client.files_upload_session_finish(b"", cursor, commit)
+    except ApiError as e:
+        if resumed and _session_lookup_error(e) is not None:
+            journal.finish(key)
+            return _upload_concurrent_session(dbx_client, source, commit, chunk_size, parallelism, journal, key)
+        raise
+    if journal is not None:
+        journal.finish(key)
+    return metadata
+
+# ========== BATCH COMMIT ==========
+class BatchCommitter:
+    """작은 파일들을 업로드 세션에 올려두고 files_upload_session_finish_batch_v2로 모아서 커밋한다.
+
+    파일마다 files_upload로 따로 커밋하면 네임스페이스 쓰기 잠금을 두고 경합해
+    too_many_write_operations가 나기 쉽다. upload()는 자기 파일이 포함된 배치가
+    커밋될 때까지 기다렸다가 그 파일의 FileMetadata를 돌려준다.
+    """
+
+    def __init__(self, dbx, max_entries: int = BATCH_MAX_ENTRIES, max_delay: float = BATCH_MAX_DELAY):
+        self.dbx = dbx
+        self.max_entries = max_entries
+        self.max_delay = max_delay
+        self._pending: list[tuple["UploadSessionFinishArg", Future]] = []
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def upload(self, data: bytes, dropbox_path: str):
+        from dropbox.files import CommitInfo, UploadSessionCursor, UploadSessionFinishArg, WriteMode
+
+        session = self.dbx.files_upload_session_start(data, close=True)
+        entry = UploadSessionFinishArg(
+            cursor=UploadSessionCursor(session_id=session.session_id, offset=len(data)),
+            commit=CommitInfo(path=dropbox_path, mode=WriteMode.add, autorename=True),
+        )
+        future = Future()
+        batch = None
+        with self._lock:
+            self._pending.append((entry, future))
+            if len(self._pending) >= self.max_entries:
+                batch = self._take()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.max_delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if batch:
+            self._commit(batch)
+        return future.result()
+
+    def flush(self):
+        with self._lock:
+            batch = self._take()
+        if batch:
+            self._commit(batch)
+
+    def _take(self):
+        batch, self._pending = self._pending, []
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        return batch
+
+    def _commit(self, batch):
+        # v2는 결과를 동기로 돌려주므로 async_job_id를 폴링할 필요가 없다
+        try:
+            result = self.dbx.files_upload_session_finish_batch_v2([entry for entry, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for (entry, future), outcome in zip(batch, result.entries):
+            if outcome.is_success():
+                future.set_result(outcome.get_success())
+            else:
+                future.set_exception(RuntimeError(f"{entry.commit.path}: 일괄 커밋 실패 - {outcome.get_failure()}"))
+
+_batch_committers = weakref.WeakKeyDictionary()
+_batch_committers_lock = threading.Lock()
+
+def get_batch_committer(dbx) -> BatchCommitter:
+    # 같은 클라이언트로 올리는 작업들이 한 배치에 모이도록 클라이언트마다 하나만 쓴다
+    with _batch_committers_lock:
+        if dbx not in _batch_committers:
+            _batch_committers[dbx] = BatchCommitter(dbx)
+        return _batch_committers[dbx]
@@ -0,0 +1,225 @@
+import base64
+import io
+import mmap
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from multiprocessing import shared_memory
+
+from PIL import Image, ImageOps
+
+# ========== BACKGROUND REMOVAL ==========
+_rembg_lock = threading.Lock()
+
+@lru_cache(maxsize=None)
+def get_rembg_session(model_name: str | None = None, threads: int = 0):
+    """프로세스 전체에서 모델별로 한 번만 ONNX 세션을 만든다. model_name이 없으면 rembg 기본 모델을 쓴다.
+
+    threads가 0이면 ONNX Runtime 기본값(코어 수)을 따른다. 모듈 수준 캐시라 Streamlit이
+    앱 스크립트를 다시 실행해도 세션이 유지된다.
+    """
+    # 렌더링 전용 워커 프로세스가 onnxruntime까지 불러오지 않도록 필요할 때 import 한다
+    import onnxruntime as ort
+    from rembg import new_session
+
+    sess_opts = ort.SessionOptions()
+    if threads:
+        sess_opts.intra_op_num_threads = threads
+        sess_opts.inter_op_num_threads = threads
+    if model_name:
+        return new_session(model_name, sess_opts=sess_opts)
+    return new_session(sess_opts=sess_opts)
+
+def warm_rembg_session(model_name: str | None = None, threads: int = 0):
+    # 가중치 로딩과 첫 추론 때의 그래프 최적화를 미리 치러 둔다
+    remove_background(Image.new("RGB", (64, 64)), model_name, threads)
+
+def remove_background(image: Image.Image, model_name: str | None = None, threads: int = 0,
+                      only_mask: bool = False) -> Image.Image:
+    # 세션 하나를 여러 워커가 나눠 쓴다. 추론 자체가 ONNX Runtime 스레드로 코어를 다 쓰므로
+    # 동시에 돌려도 빨라지지 않고 메모리만 늘어나서 한 번에 하나씩 실행한다
+    from rembg import remove
+
+    session = get_rembg_session(model_name, threads)
+    with _rembg_lock:
+        return remove(image, session=session, only_mask=only_mask)
+
+def alpha_thumbnail(image: Image.Image, size: tuple[int, int] = (1000, 1000), matte_edge: int = 1000,
+                    model_name: str | None = None, threads: int = 0) -> Image.Image:
+    """배경을 지운 RGBA 썸네일을 만든다.
+
+    matte_edge는 마스크를 계산할 해상도의 긴 변(px)이다. 0이면 예전처럼 원본 해상도 그대로
+    배경을 지운 뒤 줄인다. 값을 주면 그 크기로 줄인 사본에서 마스크만 구해 썸네일 크기로
+    늘려 씌우므로, 8K 원본에서도 버려질 픽셀을 처리하지 않는다. 작을수록 빠르고 경계가 무뎌진다.
+    """
+    # rembg가 EXIF 방향을 바로잡으므로 마스크와 썸네일의 방향이 어긋나지 않게 먼저 맞춰 둔다
+    image = ImageOps.exif_transpose(image)
+    if not matte_edge:
+        alpha_img = remove_background(image, model_name, threads).convert("RGBA")
+        alpha_img.thumbnail(size)
+        return alpha_img
+
+    thumb = image.copy()
+    thumb.thumbnail(size)
+    thumb = thumb.convert("RGBA")
+    if matte_edge >= max(thumb.size):
+        matte_src = thumb
+    else:
+        matte_src = thumb.copy()
+        matte_src.thumbnail((matte_edge, matte_edge))
+    mask = remove_background(matte_src.convert("RGB"), model_name, threads, only_mask=True)
+    if mask.size != thumb.size:
+        mask = mask.resize(thumb.size, Image.Resampling.BILINEAR)
+    # rembg의 naive cutout과 같은 방식으로 합성한다 (투명한 곳의 색은 0)
+    return Image.composite(thumb, Image.new("RGBA", thumb.size, 0), mask)
+
+# ========== PROCESS POOL ==========
+# 디코딩, 리사이즈, 인코딩, 배경 제거는 GIL을 오래 잡으므로 별도 프로세스에서 돌린다.
+# 큰 바이트열은 피클로 복사하지 않고 공유 메모리에 올려 이름(SharedBuffer)만 주고받는다.
+# 공유 메모리는 만든 쪽과 관계없이 마지막으로 읽은 쪽(메인 프로세스)이 release_shared()로 지운다.
+@dataclass(frozen=True)
+class SharedBuffer:
+    name: str
+    size: int
+    mode: str | None = None  # raw 래스터일 때의 PIL 모드와 크기. 없으면 인코딩된 파일 바이트
+    dims: tuple[int, int] | None = None
+
+def share_bytes(source, mode: str | None = None, dims: tuple[int, int] | None = None) -> SharedBuffer:
+    mapped = None
+    if hasattr(source, "getbuffer"):
+        view = source.getbuffer()
+    elif hasattr(source, "fileno"):
+        mapped = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(mapped)
+    else:
+        view = memoryview(source)
+    try:
+        shm = shared_memory.SharedMemory(create=True, size=max(view.nbytes, 1))
+        try:
+            shm.buf[:view.nbytes] = view.cast("B")
+        finally:
+            shm.close()
+        return SharedBuffer(shm.name, view.nbytes, mode, dims)
+    finally:
+        view.release()
+        if mapped is not None:
+            mapped.close()
+
+def read_shared(buf: SharedBuffer) -> bytes:
+    shm = shared_memory.SharedMemory(name=buf.name)
+    try:
+        return bytes(shm.buf[:buf.size])
+    finally:
+        shm.close()
+
+def release_shared(buf: SharedBuffer):
+    try:
+        shm = shared_memory.SharedMemory(name=buf.name)
+    except FileNotFoundError:
+        return
+    shm.close()
+    shm.unlink()
+
+def take_shared(buf: SharedBuffer) -> bytes:
+    try:
+        return read_shared(buf)
+    finally:
+        release_shared(buf)
+
+def _open_shared_image(buf: SharedBuffer) -> Image.Image:
+    if buf.mode is not None:
+        return Image.frombytes(buf.mode, buf.dims, read_shared(buf))
+    image = Image.open(io.BytesIO(read_shared(buf)))
+    image.load()
+    return image
+
+@lru_cache(maxsize=None)
+def get_process_pool(kind: str, max_workers: int | None = None) -> ProcessPoolExecutor:
+    # kind별로 풀을 따로 둔다 ("render": 코어 수만큼, "matting": 모델을 한 번만 올리도록 1개).
+    # Streamlit 스크립트 스레드에서 fork하면 다른 스레드의 잠금 상태까지 복제되므로 spawn을 쓴다
+    return ProcessPoolExecutor(max_workers=max_workers or os.cpu_count(), mp_context=multiprocessing.get_context("spawn"))
+
+# ========== RENDITIONS ==========
+# 포맷별 인코더 프로파일. 손실 프로파일끼리는 품질을 같게 두고 인코딩에 들이는 시간만 다르게 한다.
+# 어느 것이 나은지는 `python bench.py encoders`로 실제 샘플에서 비교해 고른다
+ENCODER_PROFILES = {
+    "JPEG": {
+        "fast": dict(quality=80),
+        "balanced": dict(quality=80, optimize=True),
+        "smallest": dict(quality=80, optimize=True, progressive=True),
+    },
+    "WEBP": {
+        "fast": dict(quality=80, method=0),
+        "balanced": dict(quality=80, method=4),
+        "smallest": dict(quality=80, method=6),
+        "lossless": dict(quality=90, method=6, lossless=True),
+    },
+}
+
+def encoder_params(format: str, profile: str) -> dict:
+    try:
+        return ENCODER_PROFILES[format][profile]
+    except KeyError:
+        choices = ", ".join(ENCODER_PROFILES.get(format, {})) or "없음"
+        raise ValueError(f"{format}: 알 수 없는 인코더 프로파일 {profile!r} (가능: {choices})") from None
+
+@dataclass
+class Rendition:
+    """원본 하나에서 만드는 썸네일 파생본 하나. 카드에는 f"{name}_url" 키로 링크가 들어간다."""
+    name: str
+    suffix: str  # 업로드 파일명 접미사 (예: "_thumb" → /ae_assets/{stem}_thumb.jpg)
+    ext: str
+    format: str
+    profile: str = "balanced"  # ENCODER_PROFILES[format]의 키
+    cutout: bool = False  # True면 배경을 지운 RGBA로 인코딩한다 (matting 풀에서 실행)
+
+    def __post_init__(self):
+        encoder_params(self.format, self.profile)  # 잘못된 설정은 첫 업로드가 아니라 시작할 때 드러나게 한다
+
+def decode_thumbnail_base(src: SharedBuffer, size: tuple[int, int]) -> SharedBuffer:
+    """원본을 한 번만 디코딩해 모든 파생본이 공유할 size 크기의 raw 래스터를 만든다.
+
+    JPEG는 draft()로 목표 크기 바로 위의 1/2, 1/4, 1/8 배율로 디코딩하므로(shrink-on-load)
+    8K 원본도 전체 해상도로 풀지 않는다. EXIF 방향은 여기서 미리 맞춘다.
+    """
+    image = Image.open(io.BytesIO(read_shared(src)))
+    ratio = min(size[0] / image.width, size[1] / image.height)
+    if ratio < 1:
+        image.draft(None, (max(1, int(image.width * ratio)), max(1, int(image.height * ratio))))
+    image.thumbnail(size)
+    image = ImageOps.exif_transpose(image)
+    if image.mode == "P":
+        image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+    elif image.mode not in ("RGB", "RGBA", "L", "LA"):
+        image = image.convert("RGB")
+    return share_bytes(image.tobytes(), image.mode, image.size)
+
+def encode_rendition(base: SharedBuffer, rendition: Rendition, matte_edge: int = 1000,
+                     model_name: str | None = None, threads: int = 0,
+                     size: tuple[int, int] | None = None) -> SharedBuffer:
+    # base는 보통 decode_thumbnail_base의 래스터다. matte_edge=0(원본 해상도에서 배경 제거)처럼 원본이 필요하면
+    # 인코딩된 원본 버퍼를 넘기고 썸네일 크기를 size로 준다
+    image = _open_shared_image(base)
+    if rendition.cutout:
+        image = alpha_thumbnail(image, size or image.size, matte_edge, model_name, threads)
+    elif size is not None:
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail(size)
+    if not rendition.cutout and image.mode in ("RGBA", "LA"):
+        image = image.convert("RGB")
+    buf = io.BytesIO()
+    image.save(buf, format=rendition.format, **encoder_params(rendition.format, rendition.profile))
+    return share_bytes(buf)
+
+def encode_data_url(base: SharedBuffer, max_edge: int, quality: int = 85) -> str:
+    # GPT에 URL 대신 바로 넣을 작은 JPEG data URL. 업로드/공유 링크를 기다리지 않아도 된다
+    image = _open_shared_image(base)
+    image.thumbnail((max_edge, max_edge))
+    if image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    buf = io.BytesIO()
+    image.save(buf, format="JPEG", quality=quality)
+    return "data:image/jpeg;base64," + base64.b64encode(buf.getvalue()).decode("ascii")
@@ -0,0 +1,103 @@
+"""로컬 폴더의 이미지를 브라우저 없이 업로드 파이프라인에 태운다 (cron 등 일괄 처리용).
+
+    python ingest.py <폴더> [--app app3] [--workers 4] [--output snippets.html] [--no-recursive]
+
+이미지마다 find_asset_for_image로 같은 이름의 .sbsar/.zip을 짝지어 앱과 같은 process_image(uploader)를 돌린다.
+진행 상황은 표준 출력에 JSON 한 줄씩(event: start | status | metrics | done | error | summary) 쓰고,
+끝난 이미지의 HTML 스니펫(generate_html_snippet)은 --output 파일에 차례로 이어 쓴다.
+이미 올린 이미지는 앱과 마찬가지로 매니페스트에서 바로 재사용되므로 같은 폴더를 다시 돌려도 된다.
+"""
+import argparse
+import importlib
+import json
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import ExitStack
+from pathlib import Path
+
+import uploader
+from dropbox_utils import BatchCommitter
+from link_index import get_link_index
+from metrics import track_image
+from upload_journal import get_upload_journal
+
+def find_images(root: Path, recursive: bool = True) -> list[Path]:
+    files = root.rglob("*") if recursive else root.glob("*")
+    return sorted(p for p in files if p.is_file() and uploader.is_image_file(p))
+
+def main():
+    parser = argparse.ArgumentParser(description="로컬 폴더 이미지 일괄 업로드")
+    parser.add_argument("directory", type=Path)
+    parser.add_argument("--app", default="app3", choices=["app2", "app3"], help="파이프라인과 프롬프트를 가져올 앱")
+    parser.add_argument("--workers", type=int, default=0, help="동시에 처리할 이미지 수 (0이면 앱의 UPLOAD_CONCURRENCY)")
+    parser.add_argument("--output", type=Path, default=Path("snippets.html"), help="HTML 스니펫을 쓸 파일")
+    parser.add_argument("--no-recursive", dest="recursive", action="store_false", help="하위 폴더는 보지 않는다")
+    args = parser.parse_args()
+
+    profile = importlib.import_module(args.app).PROFILE
+    workers = args.workers or uploader.UPLOAD_CONCURRENCY
+    emit_lock = threading.Lock()
+
+    def emit(event: str, **fields):
+        with emit_lock:
+            print(json.dumps({"event": event, "time": round(time.time(), 3), **fields}, ensure_ascii=False), flush=True)
+
+    dbx = uploader.get_dropbox_client(profile)
+    get_upload_journal(uploader.UPLOAD_JOURNAL_PATH).prune()
+    if uploader.LINK_INDEX_SYNC:
+        get_link_index(uploader.LINK_INDEX_PATH).ensure_synced(dbx, "/ae_assets", uploader.convert_dropbox_url)
+    batch = BatchCommitter(dbx) if uploader.UPLOAD_BATCH_COMMIT else None
+
+    images = find_images(args.directory, args.recursive)
+    emit("start", app=args.app, directory=str(args.directory), total=len(images), workers=workers)
+
+    def ingest_one(path: Path):
+        asset_path = uploader.find_asset_for_image(path)
+        with ExitStack() as files:
+            img = files.enter_context(open(path, "rb"))
+            asset = files.enter_context(open(asset_path, "rb")) if asset_path is not None else None
+            with track_image(str(path), uploader.METRICS_JSONL_PATH, uploader.METRICS_PROM_PATH) as image_metrics:
+                card = uploader.process_image(profile, dbx, img, asset,
+                                              lambda msg: emit("status", image=str(path), message=msg), batch)
+        emit("metrics", **image_metrics.to_dict())
+        return card, asset_path
+
+    started = time.monotonic()
+    done = failed = 0
+    queued = iter(images)
+    running = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool, open(args.output, "w", encoding="utf-8") as out:
+        # 수만 장이어도 파일을 한꺼번에 열지 않도록 일꾼 수의 두 배까지만 미리 넣어 둔다
+        def fill():
+            while len(running) < workers * 2:
+                path = next(queued, None)
+                if path is None:
+                    return
+                running[pool.submit(ingest_one, path)] = path
+
+        fill()
+        while running:
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                path = running.pop(future)
+                try:
+                    card, asset_path = future.result()
+                except Exception as e:
+                    failed += 1
+                    emit("error", image=str(path), error=str(e))
+                    continue
+                done += 1
+                emit("done", image=str(path), asset=str(asset_path) if asset_path else None, card=card)
+                out.write(f"<!-- {card['title']} -->\n")
+                out.write(uploader.generate_html_snippet(card["asset_url"] or card["download_url"], card["summary"]))
+                out.write("\n")
+                out.flush()
+            fill()
+
+    emit("summary", total=len(images), done=done, failed=failed, seconds=round(time.monotonic() - started, 2))
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+import functools
+import os
+import threading
+from typing import Callable, Hashable
+
+# ========== INSTANCE CACHE ==========
+def cached_instance(key: Callable[..., Hashable]):
+    """같은 key로 부르면 처음 만든 인스턴스를 돌려주는 팩토리 데코레이터.
+
+    Streamlit 재실행, 여러 탭, 작업 워커가 같은 DB 연결이나 클라이언트를 같이 쓰도록 모듈 수준에서 캐시한다.
+    lru_cache와 달리 잠금을 잡은 채로 만들므로 동시에 처음 불려도 인스턴스는 하나만 생긴다.
+    꾸민 함수의 instances()는 지금까지 만든 인스턴스 목록을 돌려준다.
+    """
+    def decorate(factory):
+        created = {}
+        lock = threading.Lock()
+
+        @functools.wraps(factory)
+        def get(*args, **kwargs):
+            k = key(*args, **kwargs)
+            with lock:
+                if k not in created:
+                    created[k] = factory(*args, **kwargs)
+                return created[k]
+
+        def instances() -> list:
+            with lock:
+                return list(created.values())
+
+        get.instances = instances
+        return get
+    return decorate
+
+def by_abspath(path: str, *args, **kwargs) -> str:
+    # 파일 하나에 연결 하나. 상대 경로와 절대 경로로 따로 열어도 같은 인스턴스를 쓴다
+    return os.path.abspath(path)
@@ -0,0 +1,221 @@
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Callable
+
+from instance_cache import cached_instance
+
+POLL_INTERVAL = 0.5  # 초. 대기 중인 작업이 없을 때 워커가 다시 확인하는 간격
+HEARTBEAT_INTERVAL = 5.0  # 초. 처리 중인 작업의 heartbeat를 이 간격으로 갱신한다
+HEARTBEAT_TIMEOUT = 60.0  # 초. heartbeat가 이만큼 멈춘 running 작업은 주인이 죽은 것으로 보고 다시 queued로 돌린다
+
+# ========== JOB QUEUE ==========
+class JobQueue:
+    """업로드 작업을 SQLite에 쌓아 두고 백그라운드 워커 스레드가 하나씩 꺼내 처리하는 큐.
+
+    올린 파일은 state_dir/spool/<job_id>/ 아래에 원래 이름 그대로 복사해 두므로 Streamlit이
+    스크립트를 다시 실행하거나 브라우저를 새로 고쳐도 작업은 계속되고, 진행 메시지와 결과 카드도
+    DB에 남아 어느 탭에서든 볼 수 있다.
+
+    여러 앱(app2, app3)과 여러 프로세스가 같은 DB를 써도 되도록 작업마다 app과 처리 중인 프로세스
+    (owner_pid, heartbeat)를 기록한다. 각 큐는 자기 app의 작업만 꺼내고 보여 주며, running 작업은
+    주인 프로세스가 죽었거나 heartbeat가 끊긴 경우에만 다시 queued로 돌린다.
+    """
+
+    def __init__(self, state_dir: str, app: str):
+        self.state_dir = state_dir
+        self.app = app
+        self.spool_dir = os.path.join(state_dir, "spool")
+        os.makedirs(self.spool_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._workers: list[threading.Thread] = []
+        self._conn = sqlite3.connect(os.path.join(state_dir, "jobs.sqlite3"), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY, image_name TEXT NOT NULL, image_path TEXT NOT NULL,"
+            " asset_name TEXT, asset_path TEXT, status TEXT NOT NULL, card TEXT, error TEXT,"
+            " created REAL NOT NULL, started REAL, finished REAL);"
+            "CREATE TABLE IF NOT EXISTS job_messages ("
+            " job_id TEXT NOT NULL, at REAL NOT NULL, message TEXT NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS job_messages_job ON job_messages (job_id, at);"
+        )
+        # app/owner 열이 없던 예전 DB에도 열을 더한다. 예전 작업은 어느 앱 것인지 모르므로 어느 큐에도 보이지 않는다
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        for column, kind in (("app", "TEXT"), ("owner_pid", "INTEGER"), ("heartbeat", "REAL")):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+        self._conn.execute("DROP INDEX IF EXISTS jobs_status")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_app_status ON jobs (app, status, created)")
+        self._conn.commit()
+
+    def _spool(self, job_dir: str, name: str, source) -> str:
+        path = os.path.join(job_dir, os.path.basename(name))
+        with open(path, "wb") as f:
+            if hasattr(source, "getbuffer"):
+                f.write(source.getbuffer())
+            else:
+                source.seek(0)
+                shutil.copyfileobj(source, f)
+        return path
+
+    def enqueue(self, image, asset=None) -> str:
+        """image/asset(.name이 있는 파일 객체)을 스풀에 복사하고 작업 id를 돌려준다."""
+        job_id = uuid.uuid4().hex
+        job_dir = os.path.join(self.spool_dir, job_id)
+        os.makedirs(job_dir)
+        image_path = self._spool(job_dir, image.name, image)
+        asset_path = self._spool(job_dir, asset.name, asset) if asset is not None else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, app, image_name, image_path, asset_name, asset_path, status, created)"
+                " VALUES (?, ?, ?, ?, ?, ?, 'queued', ?)",
+                (job_id, self.app, image.name, image_path, asset.name if asset is not None else None, asset_path,
+                 time.time()),
+            )
+            self._conn.commit()
+        return job_id
+
+    def _claim(self) -> dict | None:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "UPDATE jobs SET status = 'running', started = ?, owner_pid = ?, heartbeat = ? WHERE id = ("
+                " SELECT id FROM jobs WHERE app = ? AND status = 'queued' ORDER BY created LIMIT 1) RETURNING *",
+                (now, os.getpid(), now, self.app),
+            ).fetchone()
+            self._conn.commit()
+        return dict(row) if row is not None else None
+
+    def add_message(self, job_id: str, message: str):
+        with self._lock:
+            self._conn.execute("INSERT INTO job_messages VALUES (?, ?, ?)", (job_id, time.time(), message))
+            self._conn.commit()
+
+    def _finish(self, job_id: str, status: str, card: dict | None = None, error: str | None = None):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, card = ?, error = ?, finished = ? WHERE id = ?",
+                (status, json.dumps(card, ensure_ascii=False) if card is not None else None, error, time.time(), job_id),
+            )
+            self._conn.commit()
+
+    def _row(self, row) -> dict:
+        job = dict(row)
+        job["card"] = json.loads(job["card"]) if job["card"] else None
+        return job
+
+    def get(self, job_id: str) -> dict | None:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row(row) if row is not None else None
+
+    def list_jobs(self, limit: int = 100) -> list[dict]:
+        # 최근에 넣은 작업부터
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM jobs WHERE app = ? ORDER BY created DESC LIMIT ?", (self.app, limit)
+            ).fetchall()
+        return [self._row(row) for row in rows]
+
+    def messages(self, job_id: str) -> list[str]:
+        with self._lock:
+            rows = self._conn.execute("SELECT message FROM job_messages WHERE job_id = ? ORDER BY at", (job_id,)).fetchall()
+        return [row[0] for row in rows]
+
+    def clear_finished(self) -> int:
+        """끝난(done/failed) 작업과 그 스풀 파일, 메시지를 지우고 지운 개수를 돌려준다."""
+        with self._lock:
+            ids = [row[0] for row in self._conn.execute(
+                "SELECT id FROM jobs WHERE app = ? AND status IN ('done', 'failed')", (self.app,))]
+            self._conn.executemany("DELETE FROM job_messages WHERE job_id = ?", [(i,) for i in ids])
+            self._conn.executemany("DELETE FROM jobs WHERE id = ?", [(i,) for i in ids])
+            self._conn.commit()
+        for job_id in ids:
+            shutil.rmtree(os.path.join(self.spool_dir, job_id), ignore_errors=True)
+        return len(ids)
+
+    def start(self, handler: Callable[[dict, Callable[[str], None]], dict], workers: int = 1):
+        """handler(job, report) -> 결과 카드를 실행할 워커 스레드를 띄운다. 이미 떠 있으면 아무것도 하지 않는다."""
+        with self._lock:
+            if self._workers:
+                return
+            self._requeue_orphans()
+            for n in range(workers):
+                worker = threading.Thread(target=self._work, args=(handler,), name=f"job-worker-{n}", daemon=True)
+                self._workers.append(worker)
+                worker.start()
+            heartbeat = threading.Thread(target=self._beat, name="job-heartbeat", daemon=True)
+            self._workers.append(heartbeat)
+            heartbeat.start()
+
+    def _requeue_orphans(self) -> int:
+        # 죽은 프로세스가 처리하다 만 작업은 처음부터 다시 한다 (업로드는 저널로 이어진다).
+        # 살아 있는 다른 프로세스가 처리 중인 작업은 건드리지 않는다. self._lock을 잡은 채로 부른다
+        stale = time.time() - HEARTBEAT_TIMEOUT
+        rows = self._conn.execute(
+            "SELECT id, owner_pid, heartbeat FROM jobs WHERE app = ? AND status = 'running'", (self.app,)
+        ).fetchall()
+        orphans = [(row["id"], row["heartbeat"]) for row in rows
+                   if row["heartbeat"] is None or row["heartbeat"] < stale or not _process_alive(row["owner_pid"])]
+        # 그 사이 주인이 heartbeat를 갱신했다면 그대로 둔다
+        self._conn.executemany(
+            "UPDATE jobs SET status = 'queued', started = NULL, owner_pid = NULL, heartbeat = NULL"
+            " WHERE id = ? AND status = 'running' AND heartbeat IS ?",
+            orphans,
+        )
+        self._conn.commit()
+        return len(orphans)
+
+    def _beat(self):
+        while True:
+            time.sleep(HEARTBEAT_INTERVAL)
+            with self._lock:
+                self._conn.execute(
+                    "UPDATE jobs SET heartbeat = ? WHERE app = ? AND status = 'running' AND owner_pid = ?",
+                    (time.time(), self.app, os.getpid()),
+                )
+                self._conn.commit()
+                # 다른 프로세스가 죽으며 남긴 작업도 이 프로세스를 다시 띄우지 않고 넘겨받는다
+                self._requeue_orphans()
+
+    def _work(self, handler):
+        while True:
+            job = self._claim()
+            if job is None:
+                time.sleep(POLL_INTERVAL)
+                continue
+            try:
+                card = handler(job, lambda msg, job_id=job["id"]: self.add_message(job_id, msg))
+            except Exception as e:
+                self.add_message(job["id"], f"업로드 실패 - {e}")
+                self._finish(job["id"], "failed", error=str(e))
+                continue
+            self.add_message(job["id"], "완료")
+            self._finish(job["id"], "done", card=card)
+
+def _process_alive(pid: int | None) -> bool:
+    if pid is None:
+        return False
+    if pid == os.getpid():
+        return True
+    if os.name != "posix":
+        # Windows의 os.kill은 신호 0이어도 프로세스를 끝내므로 heartbeat만 본다
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+@cached_instance(lambda state_dir, app: (os.path.abspath(state_dir), app))
+def get_job_queue(state_dir: str, app: str) -> JobQueue:
+    # Streamlit 재실행과 여러 브라우저 탭이 같은 큐와 워커를 공유한다
+    return JobQueue(state_dir, app)
@@ -0,0 +1,173 @@
+import asyncio
+import random
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+
+import metrics
+from instance_cache import cached_instance
+
+DECREASE_FACTOR = 0.5  # 제한 응답을 받으면 한도에 곱하는 값
+DECREASE_COOLDOWN = 1.0  # 초. 동시에 나간 요청들이 한꺼번에 제한 응답을 받아도 이 간격에 한 번만 줄인다
+ASYNC_POLL_INTERVAL = 0.05  # 초. 이벤트 루프에서 자리가 나기를 기다릴 때 다시 보는 간격
+MAX_RETRIES = 6
+BACKOFF_BASE = 1.0  # 초. 재시도마다 두 배씩, BACKOFF_CAP까지 늘린 범위에서 무작위로 기다린다
+BACKOFF_CAP = 60.0
+
+def backoff_delay(attempt: int, retry_after: float | None = None) -> float:
+    # 지터를 준 지수 백오프. 서버가 retry_after를 알려 주면 그만큼 기다리고 지터만 조금 더한다
+    delay = random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+    if retry_after is not None:
+        delay = retry_after + delay / 4
+    return delay
+
+# ========== AIMD LIMITER ==========
+class AdaptiveLimiter:
+    """백엔드 하나로 동시에 나가는 요청 수를 AIMD로 조절하는 제한기.
+
+    요청이 성공할 때마다 한도를 1/한도씩 올려(한도만큼 성공하면 +1) maximum까지 천천히 늘리고,
+    제한 응답(429, too_many_write_operations 등)을 받으면 절반으로 줄인다. retry_after가 오면 그동안은
+    새 요청을 내보내지 않는다. 스레드에서는 slot(), 이벤트 루프에서는 async_slot()으로 자리를 잡는다.
+    """
+
+    def __init__(self, name: str, maximum: int, minimum: int = 1):
+        self.name = name
+        self.maximum = max(1, maximum)
+        self.minimum = max(1, min(minimum, self.maximum))
+        self.limit = float(self.maximum)
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.throttles = 0
+        self._decreased_at = 0.0
+        self._cond = threading.Condition()
+
+    def _wait(self) -> float | None:
+        # 지금 들어갈 수 있으면 0, 멈춘 동안이면 남은 초, 자리가 없으면 None (누가 나갈 때까지)
+        now = time.monotonic()
+        if now < self.paused_until:
+            return self.paused_until - now
+        return 0.0 if self.in_flight < int(self.limit) else None
+
+    def acquire(self):
+        with self._cond:
+            while (wait := self._wait()) != 0.0:
+                self._cond.wait(wait)
+            self.in_flight += 1
+
+    async def acquire_async(self):
+        # 다른 스레드가 자리를 내놓아도 루프를 깨울 수 없으므로 짧게 자며 다시 본다
+        while True:
+            with self._cond:
+                wait = self._wait()
+                if wait == 0.0:
+                    self.in_flight += 1
+                    return
+            await asyncio.sleep(min(wait, ASYNC_POLL_INTERVAL) if wait is not None else ASYNC_POLL_INTERVAL)
+
+    def release(self):
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify()
+
+    @contextmanager
+    def slot(self):
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    @asynccontextmanager
+    async def async_slot(self):
+        await self.acquire_async()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def succeeded(self):
+        with self._cond:
+            if self.limit < self.maximum:
+                before = int(self.limit)
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+                if int(self.limit) > before:
+                    self._cond.notify()
+
+    def throttled(self, retry_after: float | None = None):
+        with self._cond:
+            now = time.monotonic()
+            self.throttles += 1
+            if now - self._decreased_at >= DECREASE_COOLDOWN:
+                self.limit = max(self.minimum, self.limit * DECREASE_FACTOR)
+                self._decreased_at = now
+            if retry_after:
+                self.paused_until = max(self.paused_until, now + retry_after)
+        metrics.count(f"{self.name}.throttled")
+
+    def snapshot(self) -> dict:
+        with self._cond:
+            return {"limit": round(self.limit, 2), "maximum": self.maximum, "in_flight": self.in_flight,
+                    "throttles": self.throttles}
+
+@cached_instance(lambda name, maximum: name)
+def get_limiter(name: str, maximum: int) -> AdaptiveLimiter:
+    # 백엔드마다 프로세스에서 하나를 같이 쓴다 (처음 부를 때의 maximum이 쓰인다)
+    return AdaptiveLimiter(name, maximum)
+
+def limiters() -> dict[str, dict]:
+    return {limiter.name: limiter.snapshot() for limiter in get_limiter.instances()}
+
+# ========== DROPBOX ==========
+# 5xx나 연결 오류 뒤에는 다시 보내도 결과가 같은 호출만 다시 보낸다. 커밋(files_upload, *_finish*)은 실제로는
+# 반영됐는데 응답만 못 받았을 수 있어 다시 보내면 autorename으로 사본이 생기고, 링크 생성은 이미 있다는 오류가 난다.
+# 제한 응답(429)은 서버가 처리하지 않고 돌려보낸 것이라 어느 호출이든 다시 보낸다.
+# append는 같은 세션, 같은 오프셋에 같은 바이트를 다시 쓰는 것이라 세션 내용이 달라지지 않는다
+IDEMPOTENT_DROPBOX_CALLS = frozenset({
+    "files_list_folder", "files_list_folder_continue", "files_get_metadata",
+    "sharing_list_shared_links", "files_upload_session_start", "files_upload_session_append_v2",
+})
+
+class ThrottledDropbox:
+    """Dropbox 클라이언트를 감싸 files_*/sharing_* 호출을 limiter 자리 안에서 보내는 프록시.
+
+    RateLimitError는 retry_after만큼 백엔드 전체를 멈추고 한도를 줄인 뒤 다시 보내고,
+    5xx와 연결 오류는 멱등 호출(IDEMPOTENT_DROPBOX_CALLS)만 백오프 후 다시 보낸다.
+    재시도를 여기서 하므로 감싸는 클라이언트는 SDK 자체 재시도를 꺼 두어야 한다.
+    """
+
+    def __init__(self, dbx, limiter: AdaptiveLimiter, max_retries: int = MAX_RETRIES):
+        self._dbx = dbx
+        self._limiter = limiter
+        self._max_retries = max_retries
+
+    def __getattr__(self, name):
+        attr = getattr(self._dbx, name)
+        if not callable(attr) or not (name.startswith("files_") or name.startswith("sharing_")):
+            return attr
+
+        def call(*args, **kwargs):
+            return self._call(name, attr, *args, **kwargs)
+        return call
+
+    def _call(self, name: str, method, *args, **kwargs):
+        from dropbox.exceptions import InternalServerError, RateLimitError
+        from requests.exceptions import ConnectionError, Timeout
+
+        for attempt in range(self._max_retries + 1):
+            with self._limiter.slot():
+                try:
+                    result = method(*args, **kwargs)
+                except RateLimitError as e:
+                    self._limiter.throttled(e.backoff)
+                    retry_after = e.backoff
+                    if attempt == self._max_retries:
+                        raise
+                except (InternalServerError, ConnectionError, Timeout):
+                    if name not in IDEMPOTENT_DROPBOX_CALLS or attempt == self._max_retries:
+                        raise
+                    retry_after = None
+                else:
+                    self._limiter.succeeded()
+                    return result
+            metrics.count("dropbox.retry")
+            time.sleep(backoff_delay(attempt, retry_after))
@@ -0,0 +1,115 @@
+import sqlite3
+import threading
+import time
+from typing import TYPE_CHECKING, Callable
+
+from instance_cache import by_abspath, cached_instance
+
+if TYPE_CHECKING:
+    from dropbox.files import FileMetadata
+
+# ========== LINK INDEX ==========
+_SAME_FILE = "files.content_hash IS NULL OR files.content_hash = excluded.content_hash"
+
+class LinkIndex:
+    """Dropbox 경로별 content_hash, 크기, 공유 링크와 그 raw=1/dl=1 변형을 기억하는 SQLite 색인.
+
+    업로드할 때와 링크를 만들 때 채워지고, sync()로 폴더 목록과 공유 링크 목록에서 한꺼번에 채울 수도 있다.
+    이미 아는 파일의 링크는 API를 부르지 않고 여기서 바로 돌려준다.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._synced: set[str] = set()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            " path_lower TEXT PRIMARY KEY, path_display TEXT NOT NULL, content_hash TEXT, size INTEGER,"
+            " shared_url TEXT, raw_url TEXT, dl_url TEXT, updated REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, path: str) -> dict | None:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM files WHERE path_lower = ?", (path.lower(),)).fetchone()
+        return dict(row) if row is not None else None
+
+    def _record_file(self, path: str, content_hash: str | None, size: int | None):
+        # 같은 경로에 다른 내용이 올라왔다면 예전 파일이 지워졌던 것이므로 그 링크도 더는 쓸 수 없다.
+        # 내용을 모르던 행(링크만 기록된 경우)은 링크를 그대로 둔다
+        self._conn.execute(
+            "INSERT INTO files (path_lower, path_display, content_hash, size, updated) VALUES (?, ?, ?, ?, ?)"
+            " ON CONFLICT (path_lower) DO UPDATE SET path_display = excluded.path_display,"
+            f" shared_url = CASE WHEN {_SAME_FILE} THEN files.shared_url END,"
+            f" raw_url = CASE WHEN {_SAME_FILE} THEN files.raw_url END,"
+            f" dl_url = CASE WHEN {_SAME_FILE} THEN files.dl_url END,"
+            " content_hash = excluded.content_hash, size = excluded.size, updated = excluded.updated",
+            (path.lower(), path, content_hash, size, time.time()),
+        )
+
+    def _record_link(self, path: str, shared_url: str, raw_url: str, dl_url: str):
+        self._conn.execute(
+            "INSERT INTO files (path_lower, path_display, shared_url, raw_url, dl_url, updated) VALUES (?, ?, ?, ?, ?, ?)"
+            " ON CONFLICT (path_lower) DO UPDATE SET shared_url = excluded.shared_url, raw_url = excluded.raw_url,"
+            " dl_url = excluded.dl_url, updated = excluded.updated",
+            (path.lower(), path, shared_url, raw_url, dl_url, time.time()),
+        )
+
+    def record_file(self, metadata: "FileMetadata"):
+        with self._lock:
+            self._record_file(metadata.path_display, metadata.content_hash, metadata.size)
+            self._conn.commit()
+
+    def record_link(self, path: str, shared_url: str, raw_url: str, dl_url: str):
+        with self._lock:
+            self._record_link(path, shared_url, raw_url, dl_url)
+            self._conn.commit()
+
+    def sync(self, dbx, folder: str, convert: Callable[[str, str], str]):
+        """폴더 목록(files_list_folder)과 계정의 공유 링크 목록(sharing_list_shared_links)을 받아 색인을 채운다.
+
+        convert는 앱의 convert_dropbox_url로, raw=1/dl=1 변형을 만드는 데 쓴다.
+        """
+        from dropbox.files import DeletedMetadata, FileMetadata
+        from dropbox.sharing import FileLinkMetadata
+
+        prefix = folder.rstrip("/").lower() + "/"
+        result = dbx.files_list_folder(folder)
+        while True:
+            with self._lock:
+                for entry in result.entries:
+                    if isinstance(entry, FileMetadata):
+                        self._record_file(entry.path_display, entry.content_hash, entry.size)
+                    elif isinstance(entry, DeletedMetadata):
+                        self._conn.execute("DELETE FROM files WHERE path_lower = ?", (entry.path_lower,))
+                self._conn.commit()
+            if not result.has_more:
+                break
+            result = dbx.files_list_folder_continue(result.cursor)
+
+        cursor = None
+        while True:
+            result = dbx.sharing_list_shared_links(cursor=cursor) if cursor else dbx.sharing_list_shared_links()
+            with self._lock:
+                for link in result.links:
+                    # 폴더 링크나 다른 사람 소유라 경로를 모르는 링크는 건너뛴다
+                    if isinstance(link, FileLinkMetadata) and link.path_lower and link.path_lower.startswith(prefix):
+                        self._record_link(link.path_lower, link.url, convert(link.url, "raw=1"), convert(link.url, "dl=1"))
+                self._conn.commit()
+            if not result.has_more:
+                break
+            cursor = result.cursor
+
+    def ensure_synced(self, dbx, folder: str, convert: Callable[[str, str], str]):
+        # 프로세스마다 폴더별로 한 번만 전체 동기화한다
+        key = folder.rstrip("/").lower()
+        if key not in self._synced:
+            self.sync(dbx, folder, convert)
+            self._synced.add(key)
+
+@cached_instance(by_abspath)
+def get_link_index(path: str) -> LinkIndex:
+    return LinkIndex(path)
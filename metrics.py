@@ -0,0 +1,203 @@
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# ========== IMAGE METRICS ==========
+class ImageMetrics:
+    """이미지 하나를 처리하는 동안의 구간별 소요 시간, API 호출 수, 전송 바이트를 모은다.
+
+    여러 스테이지 스레드가 동시에 기록하므로 잠금으로 보호한다.
+    """
+
+    def __init__(self, image: str):
+        self.image = image
+        self.started = time.time()
+        self.seconds = 0.0
+        self.status = "running"
+        self.spans: dict[str, float] = {}  # 이름별 누적 초 (기록된 순서 유지)
+        self.calls: dict[str, int] = {}
+        self.bytes: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def add_span(self, name: str, seconds: float):
+        with self._lock:
+            self.spans[name] = self.spans.get(name, 0.0) + seconds
+
+    def count(self, name: str, n: int = 1):
+        with self._lock:
+            self.calls[name] = self.calls.get(name, 0) + n
+
+    def add_bytes(self, kind: str, n: int):
+        with self._lock:
+            self.bytes[kind] = self.bytes.get(kind, 0) + n
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {"image": self.image, "started": round(self.started, 3), "seconds": round(self.seconds, 4),
+                    "status": self.status, "spans": {k: round(v, 4) for k, v in self.spans.items()},
+                    "calls": dict(self.calls), "bytes": dict(self.bytes)}
+
+    def breakdown(self) -> str:
+        # 진행상황 칸에 붙일 한 줄 요약
+        with self._lock:
+            stages = ", ".join(f"{name[6:]} {secs:.2f}s" for name, secs in self.spans.items() if name.startswith("stage."))
+            others = ", ".join(f"{name} {secs:.2f}s" for name, secs in self.spans.items()
+                               if not name.startswith("stage.") and name not in self.calls)
+            apis = ", ".join(f"{name} {n}회 {self.spans.get(name, 0.0):.2f}s" for name, n in self.calls.items())
+            sent = sum(self.bytes.values()) / 2**20
+        parts = [f"소요 시간 {self.seconds:.2f}s"]
+        if stages:
+            parts.append(f"단계: {stages}")
+        if others:
+            parts.append(f"구간: {others}")
+        if apis:
+            parts.append(f"API: {apis}")
+        if sent:
+            parts.append(f"전송 {sent:.2f}MB")
+        return " | ".join(parts)
+
+_current: contextvars.ContextVar[ImageMetrics | None] = contextvars.ContextVar("image_metrics", default=None)
+
+def current() -> ImageMetrics | None:
+    return _current.get()
+
+def set_current(image_metrics: ImageMetrics | None):
+    # context를 자동으로 물려받지 못하는 곳(다른 스레드의 이벤트 루프 태스크 등)에서 명시적으로 잇는다
+    _current.set(image_metrics)
+
+# ========== REGISTRY ==========
+class MetricsRegistry:
+    """프로세스 전체 누적값. Prometheus 텍스트 형식과 이미지별 JSON lines로 내보낸다."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.span_seconds: dict[str, float] = {}
+        self.span_count: dict[str, int] = {}
+        self.calls: dict[str, int] = {}
+        self.bytes: dict[str, int] = {}
+        self.images: dict[str, int] = {}
+
+    def add_span(self, name: str, seconds: float):
+        with self._lock:
+            self.span_seconds[name] = self.span_seconds.get(name, 0.0) + seconds
+            self.span_count[name] = self.span_count.get(name, 0) + 1
+
+    def count(self, name: str, n: int = 1):
+        with self._lock:
+            self.calls[name] = self.calls.get(name, 0) + n
+
+    def add_bytes(self, kind: str, n: int):
+        with self._lock:
+            self.bytes[kind] = self.bytes.get(kind, 0) + n
+
+    def finish_image(self, status: str):
+        with self._lock:
+            self.images[status] = self.images.get(status, 0) + 1
+
+    def prometheus(self) -> str:
+        with self._lock:
+            lines = ["# HELP uploader_span_seconds Time spent in pipeline stages and API calls.",
+                     "# TYPE uploader_span_seconds summary"]
+            for name in sorted(self.span_seconds):
+                lines.append(f'uploader_span_seconds_sum{{span="{name}"}} {self.span_seconds[name]:.6f}')
+                lines.append(f'uploader_span_seconds_count{{span="{name}"}} {self.span_count[name]}')
+            lines += ["# HELP uploader_api_calls_total Dropbox/OpenAI API calls.", "# TYPE uploader_api_calls_total counter"]
+            lines += [f'uploader_api_calls_total{{api="{name}"}} {n}' for name, n in sorted(self.calls.items())]
+            lines += ["# HELP uploader_bytes_total Bytes sent.", "# TYPE uploader_bytes_total counter"]
+            lines += [f'uploader_bytes_total{{kind="{kind}"}} {n}' for kind, n in sorted(self.bytes.items())]
+            lines += ["# HELP uploader_images_total Processed images by outcome.", "# TYPE uploader_images_total counter"]
+            lines += [f'uploader_images_total{{status="{status}"}} {n}' for status, n in sorted(self.images.items())]
+        return "\n".join(lines) + "\n"
+
+registry = MetricsRegistry()
+_export_lock = threading.Lock()
+
+def export(image_metrics: ImageMetrics, jsonl_path: str | None = None, prometheus_path: str | None = None):
+    # JSON lines는 이미지마다 한 줄씩 이어 쓰고, Prometheus 파일은 node_exporter textfile 수집기용으로 통째로 바꿔 쓴다
+    with _export_lock:
+        if jsonl_path:
+            with open(jsonl_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(image_metrics.to_dict(), ensure_ascii=False) + "\n")
+        if prometheus_path:
+            tmp = f"{prometheus_path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(registry.prometheus())
+            os.replace(tmp, prometheus_path)
+
+# ========== RECORDING ==========
+@contextmanager
+def track_image(image: str, jsonl_path: str | None = None, prometheus_path: str | None = None):
+    """이 블록 안(그리고 context를 물려받은 스레드)에서 기록되는 구간과 호출을 image 앞으로 모은다."""
+    image_metrics = ImageMetrics(image)
+    token = _current.set(image_metrics)
+    started = time.perf_counter()
+    try:
+        yield image_metrics
+        image_metrics.status = "done"
+    except BaseException:
+        image_metrics.status = "failed"
+        raise
+    finally:
+        _current.reset(token)
+        image_metrics.seconds = time.perf_counter() - started
+        registry.finish_image(image_metrics.status)
+        export(image_metrics, jsonl_path, prometheus_path)
+
+@contextmanager
+def span(name: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - started
+        registry.add_span(name, seconds)
+        image_metrics = _current.get()
+        if image_metrics is not None:
+            image_metrics.add_span(name, seconds)
+
+def count(name: str, n: int = 1):
+    registry.count(name, n)
+    image_metrics = _current.get()
+    if image_metrics is not None:
+        image_metrics.count(name, n)
+
+def add_bytes(kind: str, n: int):
+    registry.add_bytes(kind, n)
+    image_metrics = _current.get()
+    if image_metrics is not None:
+        image_metrics.add_bytes(kind, n)
+
+def api_call(name: str):
+    # API 호출 한 번: 호출 수를 세고 걸린 시간을 같은 이름의 구간으로 잰다
+    count(name)
+    return span(name)
+
+def run_in_context(context: contextvars.Context, fn, *args):
+    # 스레드 풀에 넘길 때 호출한 쪽의 context(현재 이미지)를 물려준다. 같은 Context는 동시에 두 스레드가
+    # 들어갈 수 없으므로 호출마다 복사본을 쓴다
+    return context.copy().run(fn, *args)
+
+# ========== DROPBOX PROXY ==========
+class InstrumentedDropbox:
+    """Dropbox 클라이언트를 감싸 메서드 호출마다 호출 수, 걸린 시간, 올린 바이트를 기록하는 프록시.
+
+    FolderIndex 캐시가 클라이언트 객체를 키로 쓰므로 프로세스에서 한 번 만들어 계속 같은 것을 쓴다.
+    """
+
+    def __init__(self, dbx):
+        self._dbx = dbx
+
+    def __getattr__(self, name):
+        attr = getattr(self._dbx, name)
+        if not callable(attr) or not (name.startswith("files_") or name.startswith("sharing_")):
+            return attr
+
+        def call(*args, **kwargs):
+            if args and isinstance(args[0], (bytes, bytearray)):
+                add_bytes("dropbox_upload", len(args[0]))
+            with api_call(f"dropbox.{name}"):
+                return attr(*args, **kwargs)
+        return call
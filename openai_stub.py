@@ -0,0 +1,231 @@
+"""OpenAI API의 일부(채팅, 파일, Batch)를 흉내 내는 로컬 스텁 서버.
+
+실제 API 대신 이 서버를 OPENAI_BASE_URL로 지정하면 비용 없이 요약 경로 전체를 돌려 볼 수 있다.
+
+    python openai_stub.py [--port 8089] [--latency 0.5] [--batch-delay 2] [--rate-limit 5] [--error-rate 0.01]
+    OPENAI_BASE_URL=http://127.0.0.1:8089/v1 python batch_summaries.py ...
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from email.parser import BytesParser
+from email.policy import default as email_policy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ========== STUB STATE ==========
+def stub_summary(body: dict) -> str:
+    # 같은 요청에는 늘 같은 답을 준다. 이미지 URL이나 data URL 앞부분을 넣어 어떤 이미지였는지 알 수 있게 한다
+    image = ""
+    for message in body.get("messages", []):
+        if isinstance(message.get("content"), list):
+            for part in message["content"]:
+                if part.get("type") == "image_url":
+                    image = part["image_url"]["url"][:80]
+    return f"<div class=\"desc\">stub summary ({body.get('model')}): {image}</div>"
+
+def chat_completion(body: dict) -> dict:
+    content = stub_summary(body)
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex[:12]}", "object": "chat.completion", "created": int(time.time()),
+        "model": body.get("model", "stub"),
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+        "usage": {"prompt_tokens": 1000, "completion_tokens": len(content), "total_tokens": 1000 + len(content)},
+    }
+
+class OpenAIStub:
+    """스레드 하나에서 도는 스텁 서버. latency는 채팅 요청마다 더하는 지연(초),
+    batch_delay는 배치가 completed가 되기까지의 시간(초)이다. calls에 엔드포인트별 호출 수가 쌓인다.
+
+    rate_limit(초당 채팅 요청 수)를 넘으면 retry-after-ms와 함께 429를, error_rate의 확률로 500을 돌려준다.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0, batch_delay: float = 0.0,
+                 rate_limit: float = 0.0, error_rate: float = 0.0, seed: int | None = None):
+        self.latency = latency
+        self.batch_delay = batch_delay
+        self.rate_limit = rate_limit
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._recent: deque[float] = deque()
+        self.files: dict[str, bytes] = {}
+        self.batches: dict[str, dict] = {}
+        self._batch_started: dict[str, float] = {}
+        self.calls: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> str:
+        self._thread = threading.Thread(target=self._server.serve_forever, name="openai-stub", daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _count(self, endpoint: str):
+        with self._lock:
+            self.calls[endpoint] = self.calls.get(endpoint, 0) + 1
+
+    def _fault(self) -> tuple[int, int] | None:
+        # 이번 채팅 요청을 거절할지 정한다. (상태 코드, retry-after ms) 또는 None
+        with self._lock:
+            now = time.monotonic()
+            if self.rate_limit:
+                while self._recent and now - self._recent[0] >= 1.0:
+                    self._recent.popleft()
+                if len(self._recent) >= self.rate_limit:
+                    self.calls["chat.429"] = self.calls.get("chat.429", 0) + 1
+                    return 429, max(1, round((1.0 - (now - self._recent[0])) * 1000))
+                self._recent.append(now)
+            if self.error_rate and self._random.random() < self.error_rate:
+                self.calls["chat.500"] = self.calls.get("chat.500", 0) + 1
+                return 500, 0
+        return None
+
+    def _add_file(self, data: bytes, purpose: str, filename: str) -> dict:
+        file_id = f"file-{uuid.uuid4().hex[:12]}"
+        with self._lock:
+            self.files[file_id] = data
+        return {"id": file_id, "object": "file", "bytes": len(data), "created_at": int(time.time()),
+                "filename": filename, "purpose": purpose, "status": "processed"}
+
+    def _batch_view(self, batch_id: str) -> dict | None:
+        with self._lock:
+            batch = self.batches.get(batch_id)
+        if batch is None:
+            return None
+        if batch["status"] == "in_progress" and time.monotonic() - self._batch_started[batch_id] >= self.batch_delay:
+            self._complete_batch(batch)
+        return batch
+
+    def _complete_batch(self, batch: dict):
+        outputs, errors = [], []
+        for line in self.files[batch["input_file_id"]].decode("utf-8").splitlines():
+            if not line.strip():
+                continue
+            request = json.loads(line)
+            if request.get("url") != "/v1/chat/completions":
+                errors.append({"id": f"batch_req_{uuid.uuid4().hex[:12]}", "custom_id": request.get("custom_id"),
+                               "response": None, "error": {"code": "invalid_url", "message": "unsupported url"}})
+                continue
+            outputs.append({"id": f"batch_req_{uuid.uuid4().hex[:12]}", "custom_id": request["custom_id"],
+                            "response": {"status_code": 200, "request_id": uuid.uuid4().hex,
+                                         "body": chat_completion(request["body"])},
+                            "error": None})
+        encode = lambda records: "\n".join(json.dumps(r, ensure_ascii=False) for r in records).encode("utf-8")
+        batch["output_file_id"] = self._add_file(encode(outputs), "batch_output", "output.jsonl")["id"]
+        if errors:
+            batch["error_file_id"] = self._add_file(encode(errors), "batch_output", "errors.jsonl")["id"]
+        batch["request_counts"] = {"total": len(outputs) + len(errors), "completed": len(outputs), "failed": len(errors)}
+        batch["status"] = "completed"
+        batch["completed_at"] = int(time.time())
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, payload, content_type: str = "application/json", headers: dict | None = None):
+                body = payload if isinstance(payload, bytes) else json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("content-type", content_type)
+                self.send_header("content-length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("x-ratelimit-remaining-requests", "10000")
+                self.send_header("x-ratelimit-reset-requests", "6ms")
+                self.send_header("x-ratelimit-remaining-tokens", "30000000")
+                self.send_header("x-ratelimit-reset-tokens", "0s")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _not_found(self):
+                self._send(404, {"error": {"message": f"no route {self.command} {self.path}", "type": "invalid_request_error"}})
+
+            def do_POST(self):
+                data = self.rfile.read(int(self.headers.get("content-length", 0)))
+                path = self.path.split("?")[0]
+                if path == "/v1/chat/completions":
+                    stub._count("chat")
+                    fault = stub._fault()
+                    if fault is not None:
+                        status, retry_ms = fault
+                        if status == 429:
+                            return self._send(429, {"error": {"message": "stub: rate limit", "type": "requests",
+                                                              "code": "rate_limit_exceeded"}},
+                                              headers={"retry-after-ms": str(retry_ms)})
+                        return self._send(500, {"error": {"message": "stub: injected error", "type": "server_error"}})
+                    if stub.latency:
+                        time.sleep(stub.latency)
+                    return self._send(200, chat_completion(json.loads(data)))
+                if path == "/v1/files":
+                    stub._count("files.create")
+                    message = BytesParser(policy=email_policy).parsebytes(
+                        b"content-type: " + self.headers["content-type"].encode() + b"\r\n\r\n" + data)
+                    fields, content, filename = {}, b"", "upload"
+                    for part in message.iter_parts():
+                        name = part.get_param("name", header="content-disposition")
+                        if name == "file":
+                            content = part.get_payload(decode=True)
+                            filename = part.get_filename() or filename
+                        else:
+                            fields[name] = part.get_content().strip()
+                    return self._send(200, stub._add_file(content, fields.get("purpose", "batch"), filename))
+                if path == "/v1/batches":
+                    stub._count("batches.create")
+                    request = json.loads(data)
+                    batch = {"id": f"batch_{uuid.uuid4().hex[:12]}", "object": "batch", "endpoint": request["endpoint"],
+                             "input_file_id": request["input_file_id"], "completion_window": request["completion_window"],
+                             "status": "in_progress", "created_at": int(time.time()), "output_file_id": None,
+                             "error_file_id": None, "request_counts": {"total": 0, "completed": 0, "failed": 0}}
+                    with stub._lock:
+                        stub.batches[batch["id"]] = batch
+                        stub._batch_started[batch["id"]] = time.monotonic()
+                    return self._send(200, stub._batch_view(batch["id"]))
+                self._not_found()
+
+            def do_GET(self):
+                parts = self.path.split("?")[0].strip("/").split("/")
+                if parts[:2] == ["v1", "batches"] and len(parts) == 3:
+                    stub._count("batches.retrieve")
+                    batch = stub._batch_view(parts[2])
+                    return self._send(200, batch) if batch else self._not_found()
+                if parts[:2] == ["v1", "files"] and len(parts) == 4 and parts[3] == "content":
+                    stub._count("files.content")
+                    data = stub.files.get(parts[2])
+                    return self._send(200, data, "application/octet-stream") if data is not None else self._not_found()
+                self._not_found()
+
+        return Handler
+
+def main():
+    parser = argparse.ArgumentParser(description="로컬 OpenAI 스텁 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=0.0, help="채팅 요청마다 더할 지연(초)")
+    parser.add_argument("--batch-delay", type=float, default=0.0, help="배치가 완료되기까지의 시간(초)")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="초당 허용 채팅 요청 수 (넘으면 429, 0이면 무제한)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="채팅 요청이 500으로 실패할 확률")
+    args = parser.parse_args()
+    stub = OpenAIStub(args.host, args.port, args.latency, args.batch_delay, args.rate_limit, args.error_rate)
+    print(f"OPENAI_BASE_URL={stub.base_url}", flush=True)
+    try:
+        stub._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
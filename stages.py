@@ -0,0 +1,56 @@
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from metrics import run_in_context, span
+
+# ========== STAGE DAG ==========
+@dataclass
+class Stage:
+    name: str
+    func: Callable[..., Any]
+    deps: tuple[str, ...] = ()  # 선행 단계 이름. 결과가 이 순서대로 func 인자로 전달된다
+
+def run_stages(stages: list[Stage], max_workers: int | None = None) -> dict[str, Any]:
+    """선행 단계가 모두 끝난 단계부터 바로 실행하고 {단계 이름: 결과}를 돌려준다.
+
+    한 단계라도 실패하면 새 단계는 더 시작하지 않고, 실행 중인 단계가 끝나기를 기다린 뒤
+    첫 번째 예외를 그대로 다시 던진다. 각 단계의 소요 시간은 stage.<이름> 구간으로 기록된다.
+    """
+    pending = {s.name: s for s in stages}
+    for stage in stages:
+        unknown = [d for d in stage.deps if d not in pending]
+        if unknown:
+            raise ValueError(f"{stage.name}: 알 수 없는 선행 단계 {unknown}")
+
+    results: dict[str, Any] = {}
+    running = {}
+    context = contextvars.copy_context()  # 단계 스레드들도 호출한 쪽의 측정 대상(현재 이미지)에 기록한다
+
+    def run(stage: Stage, *args):
+        with span(f"stage.{stage.name}"):
+            return stage.func(*args)
+    error = None
+    with ThreadPoolExecutor(max_workers=max_workers or len(stages) or 1) as pool:
+        while pending or running:
+            if error is None:
+                for name, stage in list(pending.items()):
+                    if all(d in results for d in stage.deps):
+                        del pending[name]
+                        running[pool.submit(run_in_context, context, run, stage, *(results[d] for d in stage.deps))] = name
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    if error is None:
+                        error = e
+    if error is not None:
+        raise error
+    if pending:
+        raise ValueError(f"순환 의존성으로 실행할 수 없는 단계: {sorted(pending)}")
+    return results
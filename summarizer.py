@@ -0,0 +1,205 @@
+import asyncio
+import io
+import json
+import re
+import threading
+import time
+from concurrent.futures import Future
+from functools import lru_cache
+from typing import TYPE_CHECKING, Callable
+
+import metrics
+from clients import create_async_openai_client
+from limiter import MAX_RETRIES, backoff_delay, get_limiter
+
+if TYPE_CHECKING:
+    from openai import OpenAI
+
+BATCH_MAX_REQUESTS = 10000  # 배치 하나에 넣을 요청 수. API 한도(5만 건, 200MB)보다 넉넉히 작게 잡는다
+BATCH_FINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+# ========== RATE LIMIT BUDGET ==========
+_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+def parse_reset(value: str | None) -> float | None:
+    # x-ratelimit-reset-* 값("1s", "6m0s", "20ms")을 초로 바꾼다
+    if not value:
+        return None
+    parts = _DURATION_RE.findall(value)
+    if not parts:
+        return None
+    return sum(float(n) * _DURATION_UNITS[unit] for n, unit in parts)
+
+def retry_after(headers) -> float | None:
+    if headers is None:
+        return None
+    for name, scale in (("retry-after-ms", 0.001), ("retry-after", 1)):
+        value = headers.get(name)
+        if value:
+            try:
+                return float(value) * scale
+            except ValueError:
+                continue  # HTTP 날짜 형식은 쓰지 않고 백오프에 맡긴다
+    return None
+
+class RateBudget:
+    """응답의 x-ratelimit-* 헤더로 남은 요청/토큰 수를 따라가며, 바닥나면 리셋 시각까지 기다리게 한다.
+
+    헤더는 응답이 올 때의 값이라 그 사이 보낸 요청만큼은 직접 빼서 추정한다.
+    """
+
+    def __init__(self):
+        self._lock = asyncio.Lock()
+        self.requests = None  # 남은 요청 수 (헤더를 보기 전엔 모름)
+        self.tokens = None
+        self.requests_reset_at = 0.0
+        self.tokens_reset_at = 0.0
+
+    def update(self, headers):
+        now = time.monotonic()
+        remaining = headers.get("x-ratelimit-remaining-requests")
+        if remaining is not None:
+            self.requests = int(remaining)
+            self.requests_reset_at = now + (parse_reset(headers.get("x-ratelimit-reset-requests")) or 0)
+        remaining = headers.get("x-ratelimit-remaining-tokens")
+        if remaining is not None:
+            self.tokens = int(remaining)
+            self.tokens_reset_at = now + (parse_reset(headers.get("x-ratelimit-reset-tokens")) or 0)
+
+    async def acquire(self, tokens: int):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                wait_until = now
+                if self.requests is not None and self.requests <= 0:
+                    if now >= self.requests_reset_at:
+                        self.requests = None
+                    else:
+                        wait_until = max(wait_until, self.requests_reset_at)
+                if self.tokens is not None and self.tokens < tokens:
+                    if now >= self.tokens_reset_at:
+                        self.tokens = None
+                    else:
+                        wait_until = max(wait_until, self.tokens_reset_at)
+                if wait_until <= now:
+                    break
+                await asyncio.sleep(wait_until - now)
+            if self.requests is not None:
+                self.requests -= 1
+            if self.tokens is not None:
+                self.tokens -= tokens
+
+# ========== SUMMARIZER ==========
+class Summarizer:
+    """AsyncOpenAI로 채팅 요청을 동시에 최대 max_concurrency개까지 보내는 요약기.
+
+    이벤트 루프는 전용 스레드 하나에서 돌고, 어느 스레드에서든 submit()으로 요청을 넣고
+    concurrent.futures.Future를 받는다. 429, 연결 오류, 5xx는 retry-after를 지키며
+    지터를 준 지수 백오프로 max_retries번까지 다시 시도한다. 요금 한도 초과(insufficient_quota)는 바로 실패한다.
+    동시 요청 수는 "openai" limiter가 정한다. 429를 받으면 절반으로 줄였다가 성공이 이어지면 다시 늘린다.
+    """
+
+    def __init__(self, api_key: str | None, base_url: str | None = None, max_concurrency: int = 4,
+                 max_retries: int = MAX_RETRIES):
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, name="summarizer-loop", daemon=True).start()
+        # 재시도는 한도 예산과 함께 여기서 직접 하므로 SDK 자체 재시도는 끈다. 동시에 나가는 요청이
+        # max_concurrency개를 넘지 않으므로 연결 풀도 그만큼만 keep-alive로 들고 있는다
+        self._client = create_async_openai_client(api_key, base_url, max_concurrency, max_retries=0)
+        self._limiter = get_limiter("openai", max_concurrency)
+        self._budget = RateBudget()
+
+    def submit(self, model: str, messages: list, **params) -> Future:
+        # 루프 스레드의 태스크는 호출한 쪽 context를 물려받지 않으므로 현재 이미지 측정값을 넘겨 준다
+        return asyncio.run_coroutine_threadsafe(
+            self._complete_for(metrics.current(), model, messages, **params), self._loop)
+
+    async def _complete_for(self, image_metrics, model: str, messages: list, **params) -> str:
+        metrics.set_current(image_metrics)
+        return await self.complete(model, messages, **params)
+
+    def summarize(self, model: str, messages: list, **params) -> str:
+        return self.submit(model, messages, **params).result()
+
+    async def complete(self, model: str, messages: list, **params) -> str:
+        # openai는 불러오는 데 오래 걸려서 클라이언트를 만들 때(create_async_openai_client) 처음 import 한다
+        from openai import APIConnectionError, InternalServerError, RateLimitError
+
+        # 이미지 입력 토큰은 헤더로만 알 수 있어서 대략 1000으로 잡는다
+        estimate = params.get("max_tokens", 1000) + 1000
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self._limiter.async_slot():
+                    await self._budget.acquire(estimate)
+                    with metrics.api_call("openai.chat.completions"):
+                        raw = await self._client.chat.completions.with_raw_response.create(
+                            model=model, messages=messages, **params)
+                self._limiter.succeeded()
+                self._budget.update(raw.headers)
+                return raw.parse().choices[0].message.content.strip()
+            except (RateLimitError, APIConnectionError, InternalServerError) as e:
+                if attempt == self.max_retries or getattr(e, "code", None) == "insufficient_quota":
+                    raise
+                headers = getattr(getattr(e, "response", None), "headers", None)
+                delay = backoff_delay(attempt, retry_after(headers))
+                if isinstance(e, RateLimitError):
+                    # 다른 요청들도 같이 멈추고 동시 요청 수를 줄인다
+                    metrics.count("openai.rate_limited")
+                    if headers is not None:
+                        self._budget.update(headers)
+                    self._limiter.throttled(delay)
+                await asyncio.sleep(delay)
+
+@lru_cache(maxsize=None)
+def get_summarizer(api_key: str | None, base_url: str | None = None, max_concurrency: int = 4) -> Summarizer:
+    # 프로세스 전체에서 이벤트 루프 스레드와 연결 풀을 하나씩만 쓴다
+    return Summarizer(api_key, base_url, max_concurrency)
+
+# ========== BATCH API ==========
+def _read_jsonl(client: "OpenAI", file_id: str | None) -> list[dict]:
+    if not file_id:
+        return []
+    text = client.files.content(file_id).text
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+def run_batch(client: "OpenAI", bodies: dict[str, dict], poll_interval: float = 30.0,
+              report: Callable[[str], None] | None = None) -> dict[str, str | Exception]:
+    """채팅 요청 본문들({custom_id: body})을 Batch API로 보내고 끝날 때까지 기다린다.
+
+    {custom_id: 요약 문자열 또는 실패 사유 예외}를 돌려준다. 대화형 요청보다 느리지만(최대 24시간)
+    요금이 절반이고 분당 한도를 따로 쓰므로 수천 장을 한꺼번에 채울 때 쓴다.
+    """
+    report = report or (lambda msg: None)
+    ids = list(bodies)
+    results: dict[str, str | Exception] = {}
+    for start in range(0, len(ids), BATCH_MAX_REQUESTS):
+        chunk = ids[start:start + BATCH_MAX_REQUESTS]
+        lines = [json.dumps({"custom_id": custom_id, "method": "POST", "url": "/v1/chat/completions",
+                             "body": bodies[custom_id]}, ensure_ascii=False) for custom_id in chunk]
+        payload = io.BytesIO("\n".join(lines).encode("utf-8"))
+        payload.name = "summaries.jsonl"
+        input_file = client.files.create(file=payload, purpose="batch")
+        batch = client.batches.create(input_file_id=input_file.id, endpoint="/v1/chat/completions",
+                                      completion_window="24h")
+        report(f"배치 {batch.id} 제출 ({len(chunk)}건)")
+        while batch.status not in BATCH_FINAL_STATUSES:
+            time.sleep(poll_interval)
+            batch = client.batches.retrieve(batch.id)
+            counts = batch.request_counts
+            if counts is not None:
+                report(f"배치 {batch.id}: {batch.status} (완료 {counts.completed} / 실패 {counts.failed} / 전체 {counts.total})")
+        for record in _read_jsonl(client, batch.output_file_id) + _read_jsonl(client, batch.error_file_id):
+            custom_id = record["custom_id"]
+            response = record.get("response") or {}
+            if response.get("status_code") == 200:
+                results[custom_id] = response["body"]["choices"][0]["message"]["content"].strip()
+            else:
+                error = record.get("error") or response.get("body", {}).get("error") or {}
+                results[custom_id] = RuntimeError(error.get("message") or f"HTTP {response.get('status_code')}")
+        for custom_id in chunk:
+            # 만료/취소된 배치에서 결과가 없는 요청
+            results.setdefault(custom_id, RuntimeError(f"batch {batch.id} {batch.status}"))
+    return results
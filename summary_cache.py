@@ -0,0 +1,100 @@
+import hashlib
+import sqlite3
+import threading
+import time
+
+from instance_cache import by_abspath, cached_instance
+
+# ========== SUMMARY CACHE ==========
+def prompt_hash(*parts: str) -> str:
+    # 프롬프트 문구가 한 글자라도 바뀌면 다른 키가 되어 예전 요약을 쓰지 않는다
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+class SummaryCache:
+    """GPT 요약을 (이미지 content_hash, 모델, 프롬프트 해시)별로 보관하는 SQLite 캐시.
+
+    ttl(초)이 지난 항목은 쓰지 않고 지우며, max_entries를 넘으면 가장 오래 안 쓴 것부터 지운다.
+    hits/misses는 프로세스가 떠 있는 동안의 누적 조회 결과다.
+    """
+
+    def __init__(self, path: str, ttl: float = 30 * 24 * 3600, max_entries: int = 10000):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS summaries ("
+            " content_hash TEXT NOT NULL, model TEXT NOT NULL, prompt_hash TEXT NOT NULL,"
+            " summary TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL,"
+            " PRIMARY KEY (content_hash, model, prompt_hash))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS summaries_accessed ON summaries (accessed)")
+        self._conn.commit()
+
+    def get(self, content_hash: str, model: str, prompt: str) -> str | None:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT summary, created FROM summaries WHERE content_hash = ? AND model = ? AND prompt_hash = ?",
+                (content_hash, model, prompt),
+            ).fetchone()
+            if row is not None and now - row[1] > self.ttl:
+                self._conn.execute(
+                    "DELETE FROM summaries WHERE content_hash = ? AND model = ? AND prompt_hash = ?",
+                    (content_hash, model, prompt),
+                )
+                self._conn.commit()
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE summaries SET accessed = ? WHERE content_hash = ? AND model = ? AND prompt_hash = ?",
+                (now, content_hash, model, prompt),
+            )
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, content_hash: str, model: str, prompt: str, summary: str):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO summaries VALUES (?, ?, ?, ?, ?, ?)",
+                (content_hash, model, prompt, summary, now, now),
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now: float):
+        self._conn.execute("DELETE FROM summaries WHERE created < ?", (now - self.ttl,))
+        self._conn.execute(
+            "DELETE FROM summaries WHERE rowid IN ("
+            " SELECT rowid FROM summaries ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM summaries").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "entries": entries}
+
+@cached_instance(by_abspath)
+def _shared_summary_cache(path: str, ttl: float, max_entries: int) -> SummaryCache:
+    return SummaryCache(path, ttl, max_entries)
+
+def get_summary_cache(path: str, ttl: float = 30 * 24 * 3600, max_entries: int = 10000) -> SummaryCache:
+    # 같은 파일은 프로세스 전체에서 연결 하나를 쓴다. 다른 설정으로 다시 열려고 하면 조용히 무시하지 않고 알린다
+    cache = _shared_summary_cache(path, ttl, max_entries)
+    if (cache.ttl, cache.max_entries) != (ttl, max_entries):
+        raise ValueError(f"{path}: 요약 캐시가 이미 ttl={cache.ttl}, max_entries={cache.max_entries}로 열려 있습니다 "
+                         f"(요청: ttl={ttl}, max_entries={max_entries})")
+    return cache
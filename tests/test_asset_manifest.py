@@ -0,0 +1,15 @@
+"""AssetManifest가 여러 프로세스 사이에서 항목을 잃지 않는지 확인한다."""
+from asset_manifest import AssetManifest
+
+def test_manifests_on_the_same_file_keep_each_others_entries(tmp_path):
+    # 앱과 ingest.py처럼 같은 파일을 따로 연 두 매니페스트
+    path = str(tmp_path / "manifest.sqlite3")
+    first, second = AssetManifest(path), AssetManifest(path)
+    first.put("hash-a:thumb", {"original_url": "https://a", "thumb_url": "https://a_thumb"})
+    second.put("hash-b:thumb", {"original_url": "https://b"})
+    first.put("hash-a:thumb", {"original_url": "https://a2"})
+
+    reopened = AssetManifest(path)
+    assert reopened.get("hash-a:thumb") == {"original_url": "https://a2"}
+    assert reopened.get("hash-b:thumb") == {"original_url": "https://b"}
+    assert reopened.get("hash-c:thumb") is None
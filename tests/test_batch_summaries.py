@@ -0,0 +1,17 @@
+"""batch_summaries가 폴더 목록에서 요약할 원본과 보여 줄 썸네일을 고르는지 확인한다."""
+from batch_summaries import find_targets
+from dropbox_stub import DropboxStub
+from dropbox_utils import FolderIndex, content_hash_of
+
+def test_find_targets_prefers_thumbnails_in_a_mixed_case_folder():
+    dbx = DropboxStub()
+    for path, data in [("/AE_Assets/Rock.png", b"rock"), ("/AE_Assets/Rock_thumb.jpg", b"rock thumb"),
+                       ("/AE_Assets/Rock_thumb (1).jpg", b"rock thumb again"),
+                       ("/AE_Assets/Moss.jpg", b"moss"), ("/AE_Assets/Moss_thumb_alpha_1.png", b"moss alpha"),
+                       ("/AE_Assets/Moss copy.jpg", b"moss"), ("/AE_Assets/readme.txt", b"text")]:
+        dbx.files_upload(data, path)
+    files = FolderIndex(dbx, "/AE_Assets").files()
+    assert find_targets(files, "/AE_Assets") == {
+        content_hash_of(b"rock"): "/ae_assets/rock_thumb.jpg",
+        content_hash_of(b"moss"): "/ae_assets/moss copy.jpg",
+    }
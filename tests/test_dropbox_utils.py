@@ -0,0 +1,138 @@
+"""dropbox_utils의 폴더 색인, 일괄 커밋, 업로드 경로를 스텁 Dropbox로 확인한다."""
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pytest
+from dropbox.files import CommitInfo, UploadSessionCursor, UploadSessionFinishArg, WriteMode
+
+import dropbox_utils
+from dropbox_stub import DropboxStub
+from dropbox_utils import BatchCommitter, FolderIndex, content_hash_of, get_folder_index, upload_if_new
+from upload_journal import UploadJournal
+
+MB = 1024 * 1024
+
+# ========== FOLDER INDEX ==========
+def test_reserve_skips_taken_names_case_insensitively():
+    dbx = DropboxStub()
+    dbx.files_upload(b"a", "/ae_assets/Photo.jpg")
+    index = FolderIndex(dbx, "/ae_assets")
+    assert index.reserve("photo", "jpg") == "/ae_assets/photo_1.jpg"
+    # 예약한 이름은 커밋 전이라도 다시 내주지 않는다
+    assert index.reserve("photo", "jpg") == "/ae_assets/photo_2.jpg"
+    assert index.reserve("other", "jpg") == "/ae_assets/other.jpg"
+
+def test_release_frees_only_uncommitted_names():
+    dbx = DropboxStub()
+    index = FolderIndex(dbx, "/ae_assets")
+    path = index.reserve("big", "zip")
+    index.release(path)
+    assert index.reserve("big", "zip") == path
+    index.record(dbx.files_upload(b"zip", path))
+    index.release(path)
+    assert index.reserve("big", "zip") == "/ae_assets/big_1.zip"
+
+def test_find_by_hash_sees_existing_and_new_files(monkeypatch):
+    dbx = DropboxStub()
+    dbx.files_upload(b"old", "/ae_assets/old.jpg")
+    index = FolderIndex(dbx, "/ae_assets")
+    assert index.find_by_hash(content_hash_of(b"old")) == "/ae_assets/old.jpg"
+    assert index.find_by_hash(content_hash_of(b"new")) is None
+
+    # 다른 업로더가 올린 파일은 새로고침 간격이 지나면 cursor로 받은 변경분에서 보인다
+    dbx.files_upload(b"new", "/ae_assets/new.jpg")
+    monkeypatch.setattr(dropbox_utils, "INDEX_REFRESH_INTERVAL", 0.0)
+    assert index.find_by_hash(content_hash_of(b"new")) == "/ae_assets/new.jpg"
+    assert dbx.calls["files_list_folder"] == 1
+    assert dbx.calls["files_list_folder_continue"] >= 1
+
+def test_missing_folder_is_empty_until_first_upload():
+    index = FolderIndex(DropboxStub(), "/ae_assets")
+    assert index.files() == {}
+    assert index.reserve("a", "jpg") == "/ae_assets/a.jpg"
+
+def test_get_folder_index_is_shared_per_client_and_folder():
+    dbx = DropboxStub()
+    assert get_folder_index(dbx, "/ae_assets/") is get_folder_index(dbx, "/AE_assets")
+    assert get_folder_index(dbx, "/ae_assets") is not get_folder_index(DropboxStub(), "/ae_assets")
+
+# ========== BATCH COMMIT ==========
+def test_batch_committer_returns_each_files_metadata():
+    dbx = DropboxStub()
+    committer = BatchCommitter(dbx, max_delay=0.05)
+    payloads = {f"/ae_assets/thumb_{n}.jpg": os.urandom(1000 + n) for n in range(5)}
+    payloads["/ae_assets/same.jpg"] = b"first"
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        futures = {path: pool.submit(committer.upload, data, path) for path, data in payloads.items()}
+        clash = pool.submit(committer.upload, b"second", "/ae_assets/same.jpg")
+        results = {path: future.result() for path, future in futures.items()}
+        clashed = clash.result()
+
+    assert dbx.calls["files_upload_session_finish_batch_v2"] == 1
+    for path, metadata in results.items():
+        if path != "/ae_assets/same.jpg":
+            assert metadata.path_display == path
+        assert metadata.content_hash == content_hash_of(payloads[path])
+    # 같은 경로는 autorename으로 비켜 간다
+    assert {results["/ae_assets/same.jpg"].path_display, clashed.path_display} == {
+        "/ae_assets/same.jpg", "/ae_assets/same (1).jpg"}
+
+def test_batch_committer_fails_only_the_failed_entries():
+    dbx = DropboxStub()
+    committer = BatchCommitter(dbx)
+    session_id = dbx.files_upload_session_start(b"ok", close=True).session_id
+    good, bad = Future(), Future()
+    entry = lambda sid, path, offset: UploadSessionFinishArg(
+        cursor=UploadSessionCursor(session_id=sid, offset=offset),
+        commit=CommitInfo(path=path, mode=WriteMode.add, autorename=True))
+    committer._commit([(entry(session_id, "/ae_assets/good.jpg", 2), good),
+                       (entry("missing", "/ae_assets/bad.jpg", 0), bad)])
+    assert good.result().path_display == "/ae_assets/good.jpg"
+    with pytest.raises(RuntimeError, match="/ae_assets/bad.jpg"):
+        bad.result()
+
+# ========== UPLOAD ==========
+def test_upload_if_new_reuses_file_with_same_content():
+    dbx = DropboxStub()
+    dbx.files_upload(b"same bytes", "/ae_assets/first.jpg")
+    assert upload_if_new(dbx, b"same bytes", "/ae_assets/second", "jpg") == "/ae_assets/first.jpg"
+    assert dbx.calls["files_upload"] == 1
+
+    path = upload_if_new(dbx, b"other bytes", "/ae_assets/first", "jpg")
+    assert path == "/ae_assets/first_1.jpg"
+    # 방금 올린 파일도 색인에 들어가 다음 호출에서 바로 재사용된다
+    assert upload_if_new(dbx, b"other bytes", "/ae_assets/third", "jpg") == path
+
+
+class DroppingDropbox(DropboxStub):
+    """n번째 append가 응답 없이 끊기는 스텁."""
+
+    def __init__(self, drop_on: int):
+        super().__init__()
+        self.drop_on = drop_on
+        self.appends = 0
+
+    def files_upload_session_append_v2(self, f, cursor, close=False):
+        self.appends += 1
+        if self.appends == self.drop_on:
+            raise ConnectionError("stub: connection dropped")
+        return super().files_upload_session_append_v2(f, cursor, close)
+
+@pytest.mark.parametrize("parallelism", [1, 3])
+def test_retried_upload_resumes_journal_session(tmp_path, parallelism):
+    dbx = DroppingDropbox(drop_on=2)
+    journal = UploadJournal(str(tmp_path / "journal.sqlite3"))
+    data = os.urandom(20 * MB)
+    key = f"{content_hash_of(data)}:/ae_assets/big.zip"
+    kwargs = dict(journal=journal, chunk_size=4 * MB, parallelism=parallelism)
+
+    with pytest.raises(ConnectionError):
+        upload_if_new(dbx, data, "/ae_assets/big", "zip", **kwargs)
+    assert journal.get(key) is not None
+
+    path = upload_if_new(dbx, data, "/ae_assets/big", "zip", **kwargs)
+    # 같은 세션을 이어 올리고, 실패한 시도가 잡아 둔 이름을 그대로 쓴다
+    assert path == "/ae_assets/big.zip"
+    assert dbx.calls["files_upload_session_start"] == 1
+    assert dbx._files["/ae_assets/big.zip"].content_hash == content_hash_of(data)
+    assert journal.get(key) is None
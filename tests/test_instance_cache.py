@@ -0,0 +1,31 @@
+"""cached_instance가 키마다 인스턴스를 하나만 만드는지 확인한다."""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from instance_cache import by_abspath, cached_instance
+
+def test_concurrent_first_calls_share_one_instance():
+    created = []
+
+    @cached_instance(lambda name: name)
+    def get(name):
+        created.append(name)
+        time.sleep(0.05)  # 만드는 동안 다른 스레드가 들어와도 기다리게 한다
+        return object()
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(get, ["a"] * 8 + ["b"]))
+    assert created.count("a") == 1
+    assert len({id(r) for r in results[:8]}) == 1
+    assert get.instances() == [results[0], results[8]]
+
+def test_abspath_key_matches_relative_and_absolute_paths(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    @cached_instance(by_abspath)
+    def get(path):
+        return threading.Lock()
+
+    assert get("state.sqlite3") is get(os.path.join(tmp_path, "state.sqlite3"))
@@ -0,0 +1,58 @@
+"""JobQueue가 앱별로 작업을 나누고, 주인이 죽은 작업만 다시 queued로 돌리는지 확인한다."""
+import io
+import os
+import subprocess
+import sys
+import time
+
+import job_queue
+from job_queue import JobQueue
+
+def upload(name: str) -> io.BytesIO:
+    f = io.BytesIO(b"image bytes")
+    f.name = name
+    return f
+
+def set_owner(queue: JobQueue, job_id: str, pid: int, heartbeat: float):
+    with queue._lock:
+        queue._conn.execute("UPDATE jobs SET owner_pid = ?, heartbeat = ? WHERE id = ?", (pid, heartbeat, job_id))
+        queue._conn.commit()
+
+def test_apps_sharing_a_state_dir_only_see_their_own_jobs(tmp_path):
+    app2, app3 = JobQueue(str(tmp_path), "app2"), JobQueue(str(tmp_path), "app3")
+    first = app2.enqueue(upload("a.jpg"))
+    other = app3.enqueue(upload("b.jpg"))
+    second = app2.enqueue(upload("c.jpg"))
+
+    assert [job["id"] for job in app2.list_jobs()] == [second, first]
+    assert app3._claim()["id"] == other
+    assert app3._claim() is None
+    claimed = app2._claim()
+    assert (claimed["id"], claimed["status"], claimed["owner_pid"]) == (first, "running", os.getpid())
+
+    app2._finish(first, "done", card={"image_name": "a.jpg"})
+    app3._finish(other, "failed", error="stub")
+    assert app2.clear_finished() == 1
+    assert app3.get(other)["status"] == "failed"
+    assert os.path.isdir(os.path.join(app3.spool_dir, other))
+    assert not os.path.exists(os.path.join(app2.spool_dir, first))
+
+def test_only_jobs_of_dead_or_silent_owners_are_requeued(tmp_path):
+    queue = JobQueue(str(tmp_path), "app2")
+    ids = [queue.enqueue(upload(f"{n}.jpg")) for n in range(4)]
+    for _ in ids:
+        queue._claim()
+    dead = subprocess.Popen([sys.executable, "-c", "pass"])
+    dead.wait()
+    now = time.time()
+    set_owner(queue, ids[0], dead.pid, now)  # 주인 프로세스가 끝났다
+    set_owner(queue, ids[1], os.getppid(), now - job_queue.HEARTBEAT_TIMEOUT - 1)  # 살아 있지만 heartbeat가 끊겼다
+    set_owner(queue, ids[2], os.getppid(), now)  # 다른 프로세스가 처리 중이다
+    # ids[3]은 이 프로세스가 방금 꺼낸 작업이다
+
+    with queue._lock:
+        assert queue._requeue_orphans() == 2
+    assert [queue.get(job_id)["status"] for job_id in ids] == ["queued", "queued", "running", "running"]
+    assert queue.get(ids[0])["owner_pid"] is None
+    # 다시 돌린 작업은 먼저 들어온 순서대로 다시 꺼낸다
+    assert queue._claim()["id"] == ids[0]
@@ -0,0 +1,114 @@
+"""AdaptiveLimiter의 AIMD 조절과 ThrottledDropbox의 재시도 규칙을 확인한다."""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from dropbox import auth
+from dropbox.exceptions import InternalServerError, RateLimitError
+from dropbox.files import UploadSessionCursor
+from requests.exceptions import ConnectionError
+
+import limiter
+from dropbox_stub import DropboxStub
+from limiter import AdaptiveLimiter, ThrottledDropbox
+
+# ========== ADAPTIVE LIMITER ==========
+def test_limiter_halves_once_per_cooldown_and_grows_back(monkeypatch):
+    monkeypatch.setattr(limiter, "DECREASE_COOLDOWN", 0.05)
+    lim = AdaptiveLimiter("test", maximum=8)
+    lim.throttled()
+    lim.throttled()  # 같은 쿨다운 안의 제한 응답은 한 번만 줄인다
+    assert lim.limit == 4
+    time.sleep(0.06)
+    lim.throttled()
+    assert lim.limit == 2
+    for _ in range(2):  # 성공할 때마다 1/한도씩, 한도만큼 성공하면 대략 1 는다
+        lim.succeeded()
+    assert lim.limit == pytest.approx(2 + 1 / 2 + 1 / 2.5)
+    for _ in range(100):
+        lim.succeeded()
+    assert lim.limit == 8
+    assert lim.snapshot()["throttles"] == 3
+
+def test_limiter_never_exceeds_limit_and_honours_pause():
+    lim = AdaptiveLimiter("test", maximum=3)
+    peak, active, lock = 0, 0, threading.Lock()
+
+    def work():
+        nonlocal peak, active
+        with lim.slot():
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            time.sleep(0.01)
+            with lock:
+                active -= 1
+
+    with ThreadPoolExecutor(max_workers=10) as pool:
+        list(pool.map(lambda _: work(), range(30)))
+    assert peak == 3
+    assert lim.in_flight == 0
+
+    lim.throttled(retry_after=0.2)
+    started = time.monotonic()
+    with lim.slot():
+        pass
+    assert time.monotonic() - started >= 0.15
+
+# ========== THROTTLED DROPBOX ==========
+class ScriptedDropbox(DropboxStub):
+    """호출마다 미리 정해 둔 예외를 차례로 던진 뒤 정상 처리하는 스텁."""
+
+    def __init__(self, **faults):
+        super().__init__()
+        self.faults_left = {name: list(errors) for name, errors in faults.items()}
+
+    def _call(self, method, payload=0, commit=False):
+        errors = self.faults_left.get(method)
+        if errors:
+            raise errors.pop(0)
+        super()._call(method, payload, commit)
+
+def rate_limited(retry_after: float = 0.01) -> RateLimitError:
+    reason = auth.RateLimitReason.too_many_write_operations
+    # SDK는 retry_after(정수 초)를 backoff로 넘긴다. 테스트가 오래 걸리지 않도록 짧은 값만 backoff에 준다
+    return RateLimitError("req", auth.RateLimitError(reason, 0), retry_after)
+
+def server_error() -> InternalServerError:
+    return InternalServerError("req", 500, "stub")
+
+@pytest.fixture
+def fast_backoff(monkeypatch):
+    monkeypatch.setattr(limiter, "BACKOFF_BASE", 0.001)
+
+def test_throttled_dropbox_retries_rate_limits_on_commits(fast_backoff):
+    stub = ScriptedDropbox(files_upload=[rate_limited(), rate_limited()])
+    lim = AdaptiveLimiter("dropbox-test", maximum=4)
+    dbx = ThrottledDropbox(stub, lim)
+    metadata = dbx.files_upload(b"data", "/ae_assets/a.jpg", autorename=True)
+    assert metadata.path_display == "/ae_assets/a.jpg"
+    assert lim.throttles == 2
+    assert lim.limit < 4
+
+def test_throttled_dropbox_retries_5xx_only_when_idempotent(fast_backoff):
+    stub = ScriptedDropbox(files_list_folder=[server_error()], files_upload=[server_error()])
+    dbx = ThrottledDropbox(stub, AdaptiveLimiter("dropbox-test", maximum=4))
+    assert dbx.files_list_folder("/ae_assets").entries == []
+    # 커밋은 서버에 반영됐을 수 있으므로 다시 보내지 않는다
+    with pytest.raises(InternalServerError):
+        dbx.files_upload(b"data", "/ae_assets/a.jpg", autorename=True)
+    assert "files_upload" not in stub.calls
+
+def test_throttled_dropbox_retries_failed_appends(fast_backoff):
+    stub = ScriptedDropbox(files_upload_session_append_v2=[server_error(), ConnectionError("stub: reset")])
+    dbx = ThrottledDropbox(stub, AdaptiveLimiter("dropbox-test", maximum=4))
+    session_id = dbx.files_upload_session_start(b"abc").session_id
+    dbx.files_upload_session_append_v2(b"def", UploadSessionCursor(session_id=session_id, offset=3))
+    assert stub.calls["files_upload_session_append_v2"] == 1
+
+def test_throttled_dropbox_gives_up_after_max_retries(fast_backoff):
+    stub = ScriptedDropbox(files_list_folder=[server_error() for _ in range(3)])
+    dbx = ThrottledDropbox(stub, AdaptiveLimiter("dropbox-test", maximum=4), max_retries=2)
+    with pytest.raises(InternalServerError):
+        dbx.files_list_folder("/ae_assets")
@@ -0,0 +1,49 @@
+"""LinkIndex가 경로의 내용이 바뀌면 예전 링크를 버리는지 확인한다."""
+from dropbox.files import DeletedMetadata, FileMetadata
+
+from dropbox_stub import DropboxStub
+from dropbox_utils import content_hash_of
+from link_index import LinkIndex
+
+def file_metadata(path: str, data: bytes) -> FileMetadata:
+    return FileMetadata(name=path.rsplit("/", 1)[-1], id="id:stub", path_lower=path.lower(), path_display=path,
+                        content_hash=content_hash_of(data), size=len(data), rev="0123456789abcdef")
+
+def record_links(index: LinkIndex, path: str):
+    index.record_link(path, f"https://dropbox.test{path}?dl=0", f"https://dropbox.test{path}?raw=1",
+                      f"https://dropbox.test{path}?dl=1")
+
+def test_links_survive_same_content_and_drop_on_new_content(tmp_path):
+    index = LinkIndex(str(tmp_path / "links.sqlite3"))
+    index.record_file(file_metadata("/ae_assets/A.jpg", b"first"))
+    record_links(index, "/ae_assets/A.jpg")
+
+    index.record_file(file_metadata("/ae_assets/A.jpg", b"first"))
+    assert index.get("/ae_assets/a.jpg")["raw_url"] == "https://dropbox.test/ae_assets/A.jpg?raw=1"
+
+    # 같은 경로에 다른 내용이 올라오면 예전 파일의 링크는 더 이상 쓸 수 없다
+    index.record_file(file_metadata("/ae_assets/A.jpg", b"second version"))
+    entry = index.get("/ae_assets/A.jpg")
+    assert (entry["content_hash"], entry["size"]) == (content_hash_of(b"second version"), 14)
+    assert entry["shared_url"] is entry["raw_url"] is entry["dl_url"] is None
+
+def test_links_recorded_before_the_content_are_kept(tmp_path):
+    index = LinkIndex(str(tmp_path / "links.sqlite3"))
+    record_links(index, "/ae_assets/b.jpg")
+    index.record_file(file_metadata("/ae_assets/b.jpg", b"first"))
+    assert index.get("/ae_assets/b.jpg")["dl_url"] == "https://dropbox.test/ae_assets/b.jpg?dl=1"
+
+def test_sync_fills_links_and_forgets_deleted_files(tmp_path):
+    dbx = DropboxStub()
+    dbx.files_upload(b"kept", "/ae_assets/kept.jpg")
+    dbx.files_upload(b"gone", "/ae_assets/gone.jpg")
+    dbx.sharing_create_shared_link_with_settings("/ae_assets/kept.jpg")
+    index = LinkIndex(str(tmp_path / "links.sqlite3"))
+    index.sync(dbx, "/ae_assets", lambda url, param: url.replace("dl=0", param))
+    assert index.get("/ae_assets/kept.jpg")["raw_url"].endswith("raw=1")
+    assert index.get("/ae_assets/gone.jpg")["shared_url"] is None
+
+    dbx._changes.append(DeletedMetadata(name="gone.jpg", path_lower="/ae_assets/gone.jpg",
+                                        path_display="/ae_assets/gone.jpg"))
+    index.sync(dbx, "/ae_assets", lambda url, param: url.replace("dl=0", param))
+    assert index.get("/ae_assets/gone.jpg") is None
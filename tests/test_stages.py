@@ -0,0 +1,40 @@
+"""단계 스케줄러(run_stages)의 결과 전달, 실패 처리, 잘못된 의존성 검사를 확인한다."""
+import time
+
+import pytest
+
+from stages import Stage, run_stages
+
+def test_run_stages_passes_results_along_deps():
+    results = run_stages([
+        Stage("a", lambda: 2),
+        Stage("b", lambda a: a * 3, ("a",)),
+        Stage("c", lambda a, b: a + b, ("a", "b")),
+    ])
+    assert results == {"a": 2, "b": 6, "c": 8}
+
+def test_run_stages_stops_after_failure_and_reraises():
+    started = []
+
+    def fail():
+        raise RuntimeError("boom")
+
+    def slow():
+        time.sleep(0.1)
+        started.append("slow")
+        return "slow"
+
+    with pytest.raises(RuntimeError, match="boom"):
+        run_stages([
+            Stage("fail", fail),
+            Stage("slow", slow),
+            Stage("after", lambda _: started.append("after"), ("fail",)),
+        ])
+    # 이미 돌던 단계는 끝까지 기다리고, 실패한 단계 뒤의 단계는 시작하지 않는다
+    assert started == ["slow"]
+
+def test_run_stages_rejects_unknown_deps_and_cycles():
+    with pytest.raises(ValueError, match="알 수 없는 선행 단계"):
+        run_stages([Stage("a", lambda x: x, ("missing",))])
+    with pytest.raises(ValueError, match="순환 의존성"):
+        run_stages([Stage("root", lambda: 1), Stage("a", lambda b: b, ("b",)), Stage("b", lambda a: a, ("a",))])
@@ -0,0 +1,54 @@
+"""Batch API 일괄 요약(run_batch)을 로컬 OpenAI 스텁 서버로 확인한다."""
+import json
+
+import pytest
+
+from clients import get_openai_client
+from openai_stub import OpenAIStub
+from summarizer import run_batch
+
+class PartialBatchStub(OpenAIStub):
+    """custom_id가 "bad"로 시작하는 요청은 400으로 실패시키는 Batch 스텁."""
+
+    def _complete_batch(self, batch: dict):
+        super()._complete_batch(batch)
+        lines = self.files[batch["output_file_id"]].decode("utf-8").splitlines()
+        records = [json.loads(line) for line in lines if line.strip()]
+        for record in records:
+            if record["custom_id"].startswith("bad"):
+                record["response"] = {"status_code": 400, "body": {"error": {"message": "stub: invalid image"}}}
+        self.files[batch["output_file_id"]] = "\n".join(
+            json.dumps(r) for r in records).encode("utf-8")
+
+@pytest.fixture
+def openai_stub():
+    stub = PartialBatchStub()
+    stub.start()
+    yield stub
+    stub.stop()
+
+def chat_body(url: str) -> dict:
+    return {"model": "gpt-4o", "messages": [{"role": "user", "content": [
+        {"type": "text", "text": "describe"}, {"type": "image_url", "image_url": {"url": url}}]}]}
+
+def test_run_batch_maps_outputs_and_errors(openai_stub):
+    client = get_openai_client("test", openai_stub.base_url)
+    reports = []
+    results = run_batch(client, {"good": chat_body("https://example.com/a.jpg"),
+                                 "bad": chat_body("https://example.com/b.jpg")},
+                        poll_interval=0.01, report=reports.append)
+    assert "https://example.com/a.jpg" in results["good"]
+    assert isinstance(results["bad"], RuntimeError)
+    assert "stub: invalid image" in str(results["bad"])
+    assert openai_stub.calls["batches.create"] == 1
+    assert reports and reports[0].startswith("배치 ")
+
+def test_run_batch_marks_missing_results_of_expired_batch(openai_stub, monkeypatch):
+    def expire(batch):
+        batch["status"] = "expired"
+        batch["request_counts"] = {"total": 1, "completed": 0, "failed": 0}
+    monkeypatch.setattr(openai_stub, "_complete_batch", expire)
+    client = get_openai_client("test", openai_stub.base_url)
+    results = run_batch(client, {"late": chat_body("https://example.com/c.jpg")}, poll_interval=0.01)
+    assert isinstance(results["late"], RuntimeError)
+    assert "expired" in str(results["late"])
@@ -0,0 +1,42 @@
+"""SummaryCache의 만료(ttl)와 LRU 정리를 확인한다."""
+import time
+
+import pytest
+
+import summary_cache
+from summary_cache import SummaryCache, get_summary_cache, prompt_hash
+
+PROMPT = prompt_hash("이미지를 요약해 주세요")
+
+def test_expired_summaries_are_misses_and_removed(tmp_path, monkeypatch):
+    cache = SummaryCache(str(tmp_path / "summaries.sqlite3"), ttl=60)
+    now = time.time()
+    monkeypatch.setattr(summary_cache.time, "time", lambda: now)
+    cache.put("hash-a", "gpt-4o", PROMPT, "고양이")
+    assert cache.get("hash-a", "gpt-4o", PROMPT) == "고양이"
+    # 모델이나 프롬프트가 다르면 다른 항목이다
+    assert cache.get("hash-a", "gpt-4o-mini", PROMPT) is None
+    assert cache.get("hash-a", "gpt-4o", prompt_hash("다른 프롬프트")) is None
+
+    monkeypatch.setattr(summary_cache.time, "time", lambda: now + 61)
+    assert cache.get("hash-a", "gpt-4o", PROMPT) is None
+    assert cache.stats() == {"hits": 1, "misses": 3, "entries": 0}
+
+def test_least_recently_used_summaries_are_evicted_first(tmp_path, monkeypatch):
+    cache = SummaryCache(str(tmp_path / "summaries.sqlite3"), max_entries=2)
+    clock = iter(range(1_000_000, 1_000_100))
+    monkeypatch.setattr(summary_cache.time, "time", lambda: next(clock))
+    cache.put("hash-a", "gpt-4o", PROMPT, "a")
+    cache.put("hash-b", "gpt-4o", PROMPT, "b")
+    assert cache.get("hash-a", "gpt-4o", PROMPT) == "a"  # a를 최근에 썼으므로 b가 먼저 밀려난다
+    cache.put("hash-c", "gpt-4o", PROMPT, "c")
+    assert cache.get("hash-b", "gpt-4o", PROMPT) is None
+    assert cache.get("hash-a", "gpt-4o", PROMPT) == "a"
+    assert cache.get("hash-c", "gpt-4o", PROMPT) == "c"
+    assert cache.stats()["entries"] == 2
+
+def test_get_summary_cache_rejects_a_different_config(tmp_path):
+    path = str(tmp_path / "summaries.sqlite3")
+    assert get_summary_cache(path, ttl=60, max_entries=5) is get_summary_cache(path, ttl=60, max_entries=5)
+    with pytest.raises(ValueError, match="ttl=60"):
+        get_summary_cache(path, ttl=120, max_entries=5)
@@ -0,0 +1,43 @@
+"""UploadJournal의 기록, 만료, 여러 프로세스 공유를 확인한다."""
+import time
+
+import upload_journal
+from upload_journal import SESSION_TTL, UploadJournal
+
+def test_concurrent_journal_records_acked_chunks(tmp_path):
+    journal = UploadJournal(str(tmp_path / "journal.sqlite3"))
+    journal.start("key", "session-1", "concurrent", 12, 4)
+    journal.advance("key", 8)
+    journal.advance("key", 0)
+    journal.advance("key", 8)
+    entry = journal.get("key")
+    assert entry["session_id"] == "session-1"
+    assert entry["acked"] == [0, 8]
+    journal.finish("key")
+    assert journal.get("key") is None
+
+def test_journals_on_the_same_file_keep_each_others_entries(tmp_path):
+    # 앱과 ingest.py처럼 같은 파일을 따로 연 두 저널
+    path = str(tmp_path / "journal.sqlite3")
+    first, second = UploadJournal(path), UploadJournal(path)
+    first.start("a", "session-a", "sequential", 10, 4)
+    second.start("b", "session-b", "sequential", 10, 4)
+    first.advance("a", 4)
+    second.finish("b")
+    assert second.get("a")["offset"] == 4
+    assert first.get("b") is None
+
+def test_prune_drops_expired_sessions(tmp_path, monkeypatch):
+    journal = UploadJournal(str(tmp_path / "journal.sqlite3"))
+    now = time.time()
+    monkeypatch.setattr(upload_journal.time, "time", lambda: now - SESSION_TTL - 60)
+    journal.start("old", "session-old", "concurrent", 10, 4)
+    journal.advance("old", 0)
+    monkeypatch.setattr(upload_journal.time, "time", lambda: now)
+    journal.start("new", "session-new", "sequential", 10, 4)
+
+    assert journal.get("old") is None
+    assert journal.prune() == 1
+    reopened = UploadJournal(journal.path)
+    assert reopened.get("new") is not None
+    assert reopened._conn.execute("SELECT COUNT(*) FROM acked").fetchone()[0] == 0
@@ -0,0 +1,84 @@
+import sqlite3
+import threading
+import time
+
+from instance_cache import by_abspath, cached_instance
+
+SESSION_TTL = 6 * 24 * 3600  # 초. Dropbox 업로드 세션은 7일 뒤 만료되므로 하루 여유를 둔다
+
+# ========== UPLOAD JOURNAL ==========
+class UploadJournal:
+    """진행 중인 업로드 세션을 내용 해시별로 디스크에 기록해 두는 작은 SQLite 저널.
+
+    항목은 {"session_id", "kind", "size", "chunk_size", "offset", "acked", "created"} 형태다.
+    kind가 "sequential"이면 offset까지, "concurrent"면 acked에 든 청크 오프셋들이 서버에 반영된 상태다.
+    프로세스가 재시작되거나 업로드가 중간에 실패해도 같은 내용을 다시 올리면 이 지점부터 이어서 보낸다.
+    앱과 ingest.py처럼 여러 프로세스가 같은 파일을 써도 서로의 항목을 덮어쓰지 않도록 행 단위로 고친다.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            " key TEXT PRIMARY KEY, session_id TEXT NOT NULL, kind TEXT NOT NULL, size INTEGER NOT NULL,"
+            " chunk_size INTEGER NOT NULL, offset INTEGER NOT NULL, created REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS acked (key TEXT NOT NULL, offset INTEGER NOT NULL, PRIMARY KEY (key, offset))"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> dict | None:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM sessions WHERE key = ?", (key,)).fetchone()
+            if row is None or time.time() - row["created"] > SESSION_TTL:
+                return None
+            acked = [r[0] for r in self._conn.execute("SELECT offset FROM acked WHERE key = ? ORDER BY offset", (key,))]
+        entry = dict(row, acked=acked)
+        del entry["key"]
+        return entry
+
+    def start(self, key: str, session_id: str, kind: str, size: int, chunk_size: int, offset: int = 0):
+        with self._lock:
+            self._conn.execute("DELETE FROM acked WHERE key = ?", (key,))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, session_id, kind, size, chunk_size, offset, time.time()),
+            )
+            self._conn.commit()
+
+    def advance(self, key: str, offset: int):
+        # sequential: offset까지 서버가 받았음 / concurrent: offset에서 시작하는 청크를 서버가 받았음
+        with self._lock:
+            row = self._conn.execute("SELECT kind FROM sessions WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return
+            if row["kind"] == "concurrent":
+                self._conn.execute("INSERT OR IGNORE INTO acked VALUES (?, ?)", (key, offset))
+            else:
+                self._conn.execute("UPDATE sessions SET offset = ? WHERE key = ?", (offset, key))
+            self._conn.commit()
+
+    def finish(self, key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM sessions WHERE key = ?", (key,))
+            self._conn.execute("DELETE FROM acked WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def prune(self) -> int:
+        """만료된 세션 항목을 지우고 지운 개수를 돌려준다."""
+        with self._lock:
+            expired = self._conn.execute(
+                "DELETE FROM sessions WHERE created < ?", (time.time() - SESSION_TTL,)
+            ).rowcount
+            self._conn.execute("DELETE FROM acked WHERE key NOT IN (SELECT key FROM sessions)")
+            self._conn.commit()
+            return expired
+
+@cached_instance(by_abspath)
+def get_upload_journal(path: str) -> UploadJournal:
+    return UploadJournal(path)
@@ -0,0 +1,419 @@
+"""app2/app3가 같이 쓰는 업로드 파이프라인, 설정, 작업 화면.
+
+앱은 썸네일 파생본 목록, GPT 프롬프트, 결과 카드를 그리는 함수만 UploaderProfile로 묶어 넘긴다.
+ingest.py, batch_summaries.py, bench.py도 앱 모듈의 PROFILE을 받아 이 모듈의 함수를 부른다.
+"""
+import os
+from contextlib import ExitStack
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+from typing import Callable, List
+from dotenv import load_dotenv
+from PIL import Image
+import streamlit as st
+
+from urllib.parse import urlparse, parse_qs, urlencode, urlunparse
+
+import clients
+from asset_manifest import get_asset_manifest
+from dropbox_utils import BatchCommitter, content_hash_of, get_batch_committer, get_folder_index, upload_if_new
+from image_utils import (
+    Rendition, decode_thumbnail_base, encode_data_url, encode_rendition, encoder_params, get_process_pool, release_shared,
+    share_bytes, take_shared, warm_rembg_session,
+)
+from job_queue import get_job_queue
+from link_index import get_link_index
+from metrics import span, track_image
+from stages import Stage, run_stages
+from summarizer import get_summarizer
+from summary_cache import SummaryCache, get_summary_cache, prompt_hash
+from upload_journal import get_upload_journal
+
+# ========== CONFIG ==========
+load_dotenv()
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None  # 로컬 스텁 서버 등 (비우면 api.openai.com)
+DROPBOX_APP_KEY = os.getenv("DROPBOX_APP_KEY")
+DROPBOX_APP_SECRET = os.getenv("DROPBOX_APP_SECRET")
+DROPBOX_REFRESH_TOKEN = os.getenv("DROPBOX_REFRESH_TOKEN")
+UPLOAD_CONCURRENCY = int(os.getenv("UPLOAD_CONCURRENCY", "4"))  # 동시에 처리할 이미지 수
+UPLOAD_BATCH_COMMIT = os.getenv("UPLOAD_BATCH_COMMIT", "0") == "1"  # 작은 파일을 finish_batch로 모아서 커밋
+UPLOAD_CHUNK_MB = int(os.getenv("UPLOAD_CHUNK_MB", "8"))  # 대용량 업로드 청크 크기 (4의 배수)
+UPLOAD_PARALLELISM = int(os.getenv("UPLOAD_PARALLELISM", "4"))  # 대용량 파일 하나당 동시에 보낼 청크 수
+DROPBOX_MAX_CONNECTIONS = int(os.getenv("DROPBOX_MAX_CONNECTIONS", "0"))  # Dropbox keep-alive 연결 수 (0이면 앱의 파생본 수에 맞춘다)
+JOB_STATE_DIR = os.getenv("JOB_STATE_DIR", ".uploader_state")  # 작업 큐 DB와 올린 파일 스풀
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "1"))  # 진행 중인 작업 화면 갱신 간격
+JOB_LIST_LIMIT = int(os.getenv("JOB_LIST_LIMIT", "50"))  # 화면에 보여줄 최근 작업 수
+UPLOAD_JOURNAL_PATH = os.getenv("UPLOAD_JOURNAL_PATH", ".upload_journal.sqlite3")  # 이어 올리기용 업로드 세션 기록
+METRICS_JSONL_PATH = os.getenv("METRICS_JSONL_PATH") or None  # 이미지별 소요 시간/호출 수를 JSON lines로 이어 쓸 파일
+METRICS_PROM_PATH = os.getenv("METRICS_PROM_PATH") or None  # 누적 지표를 Prometheus 텍스트 형식으로 쓸 파일
+LINK_INDEX_PATH = os.getenv("LINK_INDEX_PATH", ".dropbox_links.sqlite3")  # 경로별 content_hash/공유 링크 색인
+LINK_INDEX_SYNC = os.getenv("LINK_INDEX_SYNC", "0") == "1"  # 시작할 때 /ae_assets 목록과 공유 링크 목록으로 색인을 채운다
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", "0")) or os.cpu_count()  # 썸네일 디코딩/인코딩 프로세스 수
+JPG_THUMB_PROFILE = os.getenv("JPG_THUMB_PROFILE", "balanced")  # 썸네일 인코더 프로파일 (image_utils.ENCODER_PROFILES)
+WEBP_THUMB_PROFILE = os.getenv("WEBP_THUMB_PROFILE", "smallest")
+ASSET_MANIFEST_PATH = os.getenv("ASSET_MANIFEST_PATH", ".ae_assets_manifest.sqlite3")  # 처리한 이미지별 결과 기록
+OPENAI_CONCURRENCY = int(os.getenv("OPENAI_CONCURRENCY", "4"))  # 동시에 보낼 GPT 요청 수 (429는 재시도)
+SUMMARY_INLINE_IMAGE = os.getenv("SUMMARY_INLINE_IMAGE", "0") == "1"  # 썸네일 링크 대신 data URL로 이미지를 보낸다
+SUMMARY_IMAGE_MAX_EDGE = int(os.getenv("SUMMARY_IMAGE_MAX_EDGE", "768"))  # data URL 이미지의 긴 변 px
+SUMMARY_IMAGE_DETAIL = os.getenv("SUMMARY_IMAGE_DETAIL") or None  # "low" | "high" | "auto" (비우면 API 기본값)
+SUMMARY_CACHE_PATH = os.getenv("SUMMARY_CACHE_PATH", ".summary_cache.sqlite3")  # GPT 요약 캐시
+SUMMARY_CACHE_TTL_DAYS = float(os.getenv("SUMMARY_CACHE_TTL_DAYS", "30"))
+SUMMARY_CACHE_MAX_ENTRIES = int(os.getenv("SUMMARY_CACHE_MAX_ENTRIES", "10000"))
+REMBG_MODEL = os.getenv("REMBG_MODEL") or None  # 비우면 rembg 기본 모델
+REMBG_THREADS = int(os.getenv("REMBG_THREADS", "0"))  # ONNX Runtime 스레드 수 (0이면 코어 수)
+ALPHA_MATTE_EDGE = int(os.getenv("ALPHA_MATTE_EDGE", "1000"))  # 배경 마스크를 계산할 긴 변 px (0이면 원본 해상도)
+
+# ========== PROFILE ==========
+@dataclass
+class UploaderProfile:
+    """앱마다 다른 부분. 나머지 파이프라인과 화면은 이 모듈이 같이 쓴다."""
+    name: str  # 작업 큐에서 앱의 작업을 구분하는 이름
+    renditions: List[Rendition]  # 썸네일 파생본 목록. 카드에는 f"{name}_url"로 들어간다
+    system_prompt: str
+    user_prompt: str
+    render_card: Callable[..., None]  # 결과 카드(dict)를 키워드 인자로 받아 그린다
+
+    @property
+    def dropbox_max_connections(self) -> int:
+        # 이미지마다 원본과 썸네일 파생본들, 자산 청크들이 동시에 나간다
+        return DROPBOX_MAX_CONNECTIONS or UPLOAD_CONCURRENCY * (UPLOAD_PARALLELISM + 1 + len(self.renditions))
+
+# ========== FILE UTILS ==========
+IMAGE_EXTENSIONS = {"jpg", "jpeg", "png"}
+
+def is_image_file(file: Path) -> bool:
+    return file.suffix.lower().lstrip(".") in IMAGE_EXTENSIONS
+
+def split_filename(file: Path) -> tuple[str, str]:
+    return file.stem, file.suffix.lstrip(".")
+
+def find_asset_for_image(image_file: Path, assets_dir: Path | None = None) -> Path | None:
+    if assets_dir is None:
+        assets_dir = image_file.parent
+    for ext in (".sbsar", ".zip"):
+        candidate = assets_dir / f"{image_file.stem}{ext}"
+        if candidate.exists():
+            return candidate
+    return None
+
+# ========== DROPBOX UTILS ==========
+def get_dropbox_client(profile: UploaderProfile) -> clients.ThrottledDropbox:
+    # 재실행마다 새로 만들지 않고 프로세스에서 하나를 같이 쓴다
+    return clients.get_dropbox_client(DROPBOX_APP_KEY, DROPBOX_APP_SECRET, DROPBOX_REFRESH_TOKEN,
+                                      profile.dropbox_max_connections)
+
+def get_or_create_shared_link(dbx, path: str) -> str:
+    # 링크를 아는 파일은 로컬 색인에서 바로 돌려주고, 모르면 API로 찾거나 만든 뒤 기록한다
+    link_index = get_link_index(LINK_INDEX_PATH)
+    known = link_index.get(path)
+    if known is not None and known["shared_url"]:
+        return known["shared_url"]
+    with span("shared_link"):
+        links = dbx.sharing_list_shared_links(path=path, direct_only=True).links
+        if links:
+            url = links[0].url
+        else:
+            url = dbx.sharing_create_shared_link_with_settings(path).url
+    link_index.record_link(path, url, convert_dropbox_url(url, 'raw=1'), convert_dropbox_url(url, 'dl=1'))
+    return url
+
+# ========== GPT SUMMARY ==========
+def convert_dropbox_urls(original_url: str) -> tuple[str, str]:
+    parsed = urlparse(original_url)
+    if 'dropbox.com' not in parsed.netloc:
+        return original_url, original_url
+    base = parsed._replace(query="")
+    raw_qs = parse_qs(parsed.query)
+    raw_qs.pop('dl', None)
+    raw_qs['raw'] = ['1']
+    raw_url = urlunparse(base._replace(query=urlencode(raw_qs, doseq=True)))
+    dl_qs = parse_qs(parsed.query)
+    dl_qs.pop('raw', None)
+    dl_qs['dl'] = ['1']
+    download_url = urlunparse(base._replace(query=urlencode(dl_qs, doseq=True)))
+    return raw_url, download_url
+
+def build_summary_request(profile: UploaderProfile, image_url: str, model: str = "gpt-4o",
+                          detail: str | None = None) -> dict:
+    # 대화형 요약과 Batch API 일괄 요약이 같은 요청 본문을 쓴다. image_url은 공유 링크나 data URL
+    raw_url, _ = convert_dropbox_urls(image_url)
+    image = {"url": raw_url}
+    if detail:
+        image["detail"] = detail
+    return dict(
+        model=model,
+        temperature=0.5,
+        messages=[
+            {"role": "system", "content": profile.system_prompt},
+            {
+                "role": "user",
+                "content": [
+                    {"type": "text", "text": profile.user_prompt},
+                    {
+                        "type": "image_url",
+                        "image_url": image
+                    }
+                ]
+            }
+        ],
+        max_tokens=900
+    )
+
+def open_summary_cache() -> SummaryCache:
+    # 캐시는 처음 연 설정을 따르므로 화면의 통계 표시를 포함해 모든 곳이 설정값을 넘기는 이 함수를 거친다
+    return get_summary_cache(SUMMARY_CACHE_PATH, SUMMARY_CACHE_TTL_DAYS * 24 * 3600, SUMMARY_CACHE_MAX_ENTRIES)
+
+def summary_prompt_hash(profile: UploaderProfile, inline: bool = False, detail: str | None = None) -> str:
+    # 요약 캐시 키. 이미지를 data URL로 보내는지와 detail도 결과를 바꾸므로 프롬프트 문구와 함께 넣는다.
+    # 기본값(링크, detail 없음)일 때는 프롬프트만의 해시라 예전 캐시 항목이 그대로 맞는다
+    parts = [profile.system_prompt, profile.user_prompt]
+    if inline:
+        parts.append("inline")
+    if detail:
+        parts.append(f"detail={detail}")
+    return prompt_hash(*parts)
+
+def generate_image_summary(profile: UploaderProfile, image_url: str | Callable[[], str], model: str = "gpt-4o",
+                           content_hash: str | None = None, detail: str | None = None) -> str:
+    # content_hash(원본 이미지 내용)를 주면 같은 이미지/모델/프롬프트의 예전 요약을 재사용한다.
+    # image_url에 함수를 주면 캐시에 없을 때만 불러 이미지를 준비한다.
+    # 429나 일시적인 오류는 summarizer가 재시도하고, 재시도가 다 실패해야 [요약 실패]가 된다
+    cache = open_summary_cache()
+    prompt = summary_prompt_hash(profile, SUMMARY_INLINE_IMAGE, detail)
+    if content_hash is not None:
+        cached = cache.get(content_hash, model, prompt)
+        if cached is not None:
+            return cached
+    try:
+        if callable(image_url):
+            image_url = image_url()
+        summarizer = get_summarizer(OPENAI_API_KEY, OPENAI_BASE_URL, OPENAI_CONCURRENCY)
+        summary = summarizer.summarize(**build_summary_request(profile, image_url, model, detail))
+    except Exception as e:
+        return f"[요약 실패: {str(e)}]"
+    if content_hash is not None:
+        cache.put(content_hash, model, prompt, summary)
+    return summary
+
+# ========== UI ==========
+def convert_dropbox_url(shared_url: str, param: str) -> str:
+    for old in ['?dl=0', '&dl=0']:
+        if old in shared_url:
+            return shared_url.replace(old, old[0] + param)
+    sep = '&' if '?' in shared_url else '?'
+    return f"{shared_url}{sep}{param}"
+
+def generate_html_snippet(asset_link: str, summary: str) -> str:
+    return f'''<div class="info" style="display:none">
+[a-tag:사용자작성]    
+[downlink:{asset_link}]
+</div>
+
+{summary}
+'''
+
+def render_job_status(jobs, job: dict):
+    stem = Path(job["image_name"]).stem
+    messages = jobs.messages(job["id"])
+    # 메시지가 늘 때마다 새 위젯이 되도록 key에 개수를 넣는다 (같은 key면 처음 값이 유지된다)
+    st.text_area(f"{stem} 진행상황", value="\n".join(f"{stem}: {m}" for m in messages), height=100,
+                 key=f"status_{job['id']}_{len(messages)}")
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def render_active_jobs(jobs):
+    # 진행 중인 작업만 주기적으로 다시 그리고, 끝난 작업이 생기면 페이지 전체를 다시 그려 결과 카드를 붙인다
+    active = [job for job in jobs.list_jobs(JOB_LIST_LIMIT) if job["status"] in ("queued", "running")]
+    active_ids = {job["id"] for job in active}
+    finished = st.session_state.get("active_jobs", set()) - active_ids
+    st.session_state["active_jobs"] = active_ids
+    if finished:
+        st.rerun()
+    for job in active:
+        render_job_status(jobs, job)
+
+# ========== PIPELINE ==========
+THUMB_SIZE = (1000, 1000)
+
+def process_image(profile: UploaderProfile, dbx, img, asset, update_status,
+                  batch: BatchCommitter | None = None) -> dict:
+    stem = Path(img.name).stem
+    _, ext = split_filename(Path(img.name))
+
+    # 원본과 자산은 read()로 통째로 복사하지 않고 파일 객체를 그대로 업로드에 넘겨 청크 단위로 읽는다.
+    # 같은 내용의 파일이 /ae_assets에 이미 있으면 업로드 없이 그 파일의 링크를 쓴다
+    def upload_and_share(payload, base_path: str, ext: str, content_hash: str | None = None) -> str:
+        path = upload_if_new(dbx, payload, base_path, ext, content_hash, link_index=get_link_index(LINK_INDEX_PATH),
+                             batch=batch, chunk_size=UPLOAD_CHUNK_MB * 2**20, parallelism=UPLOAD_PARALLELISM,
+                             report=update_status, journal=get_upload_journal(UPLOAD_JOURNAL_PATH))
+        return get_or_create_shared_link(dbx, path)
+
+    def upload_asset(_=None):
+        update_status("연관 자산 업로드 중...")
+        ext_asset = Path(asset.name).suffix.lstrip('.')
+        shared_asset = upload_and_share(asset, f"/ae_assets/{stem}", ext_asset)
+        return convert_dropbox_url(shared_asset, 'dl=1')
+
+    def summary_image_url(links: dict) -> str:
+        # 매니페스트로 건너뛸 때 요약 캐시에 없으면 부른다. data URL로 보낼 때는 원본을 다시 디코딩한다
+        if not SUMMARY_INLINE_IMAGE:
+            return links["jpg_thumb_url"]
+        pool = get_process_pool("render", RENDER_WORKERS)
+        img.seek(0)
+        buffers = [share_bytes(img)]
+        try:
+            buffers.append(pool.submit(decode_thumbnail_base, buffers[0], THUMB_SIZE).result())
+            return pool.submit(encode_data_url, buffers[1], SUMMARY_IMAGE_MAX_EDGE).result()
+        finally:
+            for buf in buffers:
+                release_shared(buf)
+
+    # 매니페스트에는 파일 링크만 두고 요약은 늘 요약 캐시(프롬프트 해시 포함)를 거친다.
+    # 앱마다 만드는 썸네일 파생본이 다르므로 파생본 목록도 키에 넣는다
+    manifest = get_asset_manifest(ASSET_MANIFEST_PATH)
+    original_hash = content_hash_of(img)
+    manifest_key = f"{original_hash}:{'+'.join(r.name for r in profile.renditions)}"
+    links = manifest.get(manifest_key)
+    if links is not None and get_folder_index(dbx, "/ae_assets").find_by_hash(original_hash) is not None:
+        update_status("이미 업로드된 이미지입니다. 기존 파일과 링크를 재사용합니다.")
+        if asset is not None:
+            links["asset_url"] = upload_asset()
+        summary = generate_image_summary(profile, lambda: summary_image_url(links), content_hash=original_hash,
+                                         detail=SUMMARY_IMAGE_DETAIL)
+        return dict(title=stem, summary=summary, **links)
+
+    # 디코딩/인코딩/배경 제거는 프로세스 풀에서 돌리고, 원본과 중간 래스터는 공유 메모리로 넘긴다
+    segments = []
+
+    def decode():
+        img.seek(0)
+        img_info = Image.open(img)  # 헤더만 읽는다. 실제 디코딩은 워커 프로세스에서
+        width, height = img_info.size
+        fmt = img_info.format
+        update_status(f"업로드 준비 완료 (이미지: {width}px×{height}px, {fmt})")
+        src = share_bytes(img)
+        segments.append(src)
+        return src
+
+    def upload_original(_):
+        update_status("원본 파일 업로드 중...")
+        return upload_and_share(img, f"/ae_assets/{stem}", ext, original_hash)
+
+    def render(src):
+        update_status("썸네일 생성 및 업로드 중...")
+        base = render_pool.submit(decode_thumbnail_base, src, THUMB_SIZE).result()
+        segments.append(base)
+        return base
+
+    def make_rendition_stage(rendition: Rendition):
+        # ALPHA_MATTE_EDGE=0이면 원본 해상도에서 배경을 지우므로 줄인 래스터 대신 원본 버퍼를 받는다
+        full_matte = rendition.cutout and not ALPHA_MATTE_EDGE
+
+        def upload_rendition(base):
+            if rendition.cutout:
+                update_status("알파 키잉 WebP 썸네일 생성 및 업로드 중...")
+                future = get_process_pool("matting", 1).submit(encode_rendition, base, rendition, ALPHA_MATTE_EDGE,
+                                                               REMBG_MODEL, REMBG_THREADS,
+                                                               THUMB_SIZE if full_matte else None)
+            else:
+                future = render_pool.submit(encode_rendition, base, rendition)
+            shared_rendition = upload_and_share(take_shared(future.result()), f"/ae_assets/{stem}{rendition.suffix}", rendition.ext)
+            return convert_dropbox_url(shared_rendition, 'raw=1')
+        return Stage(rendition.name, upload_rendition, ("decode",) if full_matte else ("render",))
+
+    def summarize(source):
+        update_status("요약 생성 중 (GPT 자문)...")
+        if SUMMARY_INLINE_IMAGE:
+            image_url = render_pool.submit(encode_data_url, source, SUMMARY_IMAGE_MAX_EDGE).result()
+        else:
+            image_url = source
+        return generate_image_summary(profile, image_url, content_hash=original_hash, detail=SUMMARY_IMAGE_DETAIL)
+
+    # 업로드 갈래들은 서로 독립이고, 썸네일 파생본은 한 번 디코딩한 래스터를 같이 쓴다.
+    # GPT 요약은 JPG 썸네일 링크를, data URL로 보낼 때는 디코딩된 래스터만 기다린다
+    stages = [
+        Stage("decode", decode),
+        Stage("original", upload_original, ("decode",)),
+        Stage("render", render, ("decode",)),
+        *(make_rendition_stage(r) for r in profile.renditions),
+        Stage("summary", summarize, ("render",) if SUMMARY_INLINE_IMAGE else ("jpg_thumb",)),
+    ]
+    if asset is not None:
+        stages.append(Stage("asset", upload_asset, ("decode",)))
+    render_pool = get_process_pool("render", RENDER_WORKERS)
+    try:
+        results = run_stages(stages)
+    finally:
+        for buf in segments:
+            release_shared(buf)
+
+    shared = results["original"]
+    card = dict(title=stem, display_url=convert_dropbox_url(shared, 'raw=1'), download_url=convert_dropbox_url(shared, 'dl=1'),
+                summary=results["summary"], asset_url=results.get("asset"),
+                **{f"{r.name}_url": results[r.name] for r in profile.renditions})
+    manifest.put(manifest_key, {key: url for key, url in card.items() if key.endswith("_url")})
+    return card
+
+def run_job(profile: UploaderProfile, dbx, batch: BatchCommitter | None, job: dict, report) -> dict:
+    # 작업 큐 워커에서 호출된다. 스풀에 원래 이름으로 복사해 둔 파일로 파이프라인을 돌린다
+    with ExitStack() as files:
+        img = files.enter_context(open(job["image_path"], "rb"))
+        asset = files.enter_context(open(job["asset_path"], "rb")) if job["asset_path"] else None
+        with track_image(job["image_name"], METRICS_JSONL_PATH, METRICS_PROM_PATH) as image_metrics:
+            card = process_image(profile, dbx, img, asset, report, batch)
+    report(image_metrics.breakdown())
+    return card
+
+def run_queued_job(profile: UploaderProfile, job: dict, report) -> dict:
+    # 작업 워커가 공유 클라이언트를 꺼내 쓰므로 스크립트 스레드는 dropbox SDK를 불러오지 않고 바로 화면을 그린다
+    dbx = get_dropbox_client(profile)
+    return run_job(profile, dbx, get_batch_committer(dbx) if UPLOAD_BATCH_COMMIT else None, job, report)
+
+# ========== MAIN ==========
+def warm_up_dropbox(profile: UploaderProfile):
+    dbx = get_dropbox_client(profile)
+    if LINK_INDEX_SYNC:
+        get_link_index(LINK_INDEX_PATH).ensure_synced(dbx, "/ae_assets", convert_dropbox_url)
+
+def main(profile: UploaderProfile):
+    get_upload_journal(UPLOAD_JOURNAL_PATH).prune()
+    st.set_page_config(page_title="Dropbox Asset Uploader", page_icon="📤")
+    st.title("Dropbox Asset Uploader")
+    st.markdown("이미지와 연관 자산 업로드, 진행사항을 텍스트로 제공합니다.")
+
+    # 업로드는 작업 큐에 넣기만 하고, 처리는 재실행과 상관없이 도는 백그라운드 워커가 맡는다
+    jobs = get_job_queue(JOB_STATE_DIR, profile.name)
+    jobs.start(partial(run_queued_job, profile), UPLOAD_CONCURRENCY)
+
+    uploaded_files = st.file_uploader("파일 업로드", type=["jpg","jpeg","png","zip","sbsar"], accept_multiple_files=True)
+    enqueued = st.session_state.setdefault("enqueued_files", set())
+    images = [f for f in uploaded_files or [] if is_image_file(Path(f.name))]
+    assets = {Path(f.name).stem: f for f in uploaded_files or [] if f.name.lower().endswith((".zip",".sbsar"))}
+    for img in images:
+        if img.file_id not in enqueued:
+            jobs.enqueue(img, assets.get(Path(img.name).stem))
+            enqueued.add(img.file_id)
+
+    if st.button("완료된 작업 지우기"):
+        jobs.clear_finished()
+    render_active_jobs(jobs)
+    for job in jobs.list_jobs(JOB_LIST_LIMIT):
+        if job["status"] in ("done", "failed"):
+            render_job_status(jobs, job)
+            if job["card"] is not None:
+                profile.render_card(**job["card"])
+
+    cache_stats = open_summary_cache().stats()
+    st.caption(f"요약 캐시: 적중 {cache_stats['hits']} / 미스 {cache_stats['misses']} (저장 {cache_stats['entries']}건)")
+
+    # 첫 화면을 그린 뒤에 워커 프로세스, 배경 제거 모델, SDK import와 클라이언트 생성을 백그라운드에서 미리 치러 둔다.
+    # 프로세스에서 한 번만 돈다
+    warm_ups = [
+        lambda: get_process_pool("render", RENDER_WORKERS).submit(encoder_params, "JPEG", JPG_THUMB_PROFILE),
+        partial(warm_up_dropbox, profile),
+        lambda: get_summarizer(OPENAI_API_KEY, OPENAI_BASE_URL, OPENAI_CONCURRENCY),
+    ]
+    if any(r.cutout for r in profile.renditions):
+        warm_ups.insert(0, lambda: get_process_pool("matting", 1).submit(warm_rembg_session, REMBG_MODEL, REMBG_THREADS))
+    clients.warm_up("uploader", *warm_ups)